@@ -1,16 +1,22 @@
-from flask import Flask
+from flask import Flask, request
 from werkzeug.middleware.proxy_fix import ProxyFix
-import json
 import os
 
 # Load .flaskenv before creating the app
-from dotenv import load_dotenv
-import os as _os
-_flaskenv_path = _os.path.join(_os.path.dirname(_os.path.dirname(_os.path.abspath(__file__))), '.flaskenv')
-load_dotenv(_flaskenv_path)
+# Skipped when SECRET_KEY is already in the environment (systemd/container
+# deployments, or a reloader child that inherited the parent's env)
+if not os.environ.get('SECRET_KEY'):
+    from dotenv import load_dotenv
+    import os as _os
+    _flaskenv_path = _os.path.join(_os.path.dirname(_os.path.dirname(_os.path.abspath(__file__))), '.flaskenv')
+    load_dotenv(_flaskenv_path)
 
 app = Flask(__name__)
 
+# Encode/decode all JSON (jsonify, request.get_json) with orjson
+from app.json_provider import OrjsonProvider
+app.json = OrjsonProvider(app)
+
 # Apply ProxyFix if Nexus is behind another reverse proxy (e.g., nginx, cloudflare)
 # This ensures correct client IP detection for rate limiting and logging
 # Set BEHIND_PROXY=true in .flaskenv if using an external reverse proxy
@@ -24,14 +30,22 @@ if os.environ.get('BEHIND_PROXY', 'false').lower() in ('true', '1', 'yes'):
     )
 
 # Configure rate limiting (higher limits for gateway service)
+# With REDIS_URI set, counters live in Redis so limits hold across all gunicorn
+# workers and hosts; without it each worker keeps its own in-memory counters.
 from flask_limiter import Limiter
 from app.rate_limit_key import get_user_id_or_ip
+from app.redis_client import REDIS_URI, get_redis_pool
 
 limiter = Limiter(
     app=app,
     key_func=get_user_id_or_ip,  # Per-user rate limiting
-    default_limits=["20000 per hour", "1000 per minute"],  # Higher limits for gateway on local LAN
-    storage_uri="memory://"
+    # Higher limit for gateway on local LAN. A single limit means one storage
+    # check per request; the old extra "20000 per hour" cap on sustained
+    # traffic (~333/min) has been dropped in favour of the per-minute window.
+    default_limits=["1000 per minute"],
+    storage_uri=REDIS_URI or "memory://",
+    storage_options={'connection_pool': get_redis_pool()} if REDIS_URI else {},
+    strategy="moving-window"  # Sorted-set rolling window, one atomic Lua call per limit
 )
 
 # Explicitly load the secret key from the environment variables loaded from .flaskenv
@@ -45,9 +59,26 @@ app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 app.config['PERMANENT_SESSION_LIFETIME'] = 3600  # 1 hour
 
+# Server-side sessions: with SESSION_STORE=redis (and REDIS_URI set) session
+# data lives in Redis and the cookie only holds a random session id
+if os.environ.get('SESSION_STORE', 'cookie').lower() == 'redis' and get_redis_pool() is not None:
+    from app.redis_session import RedisSessionInterface
+    app.session_interface = RedisSessionInterface()
+
 # Disable static file caching in development
 app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0  # No caching for static files
 
+# Assets requested with a ?v=VERSION cache-buster never change under that URL,
+# so those are cached for a year regardless of the default above
+STATIC_VERSIONED_MAX_AGE = 31536000
+
+def _static_max_age(filename):
+    if request.args.get('v'):
+        return STATIC_VERSIONED_MAX_AGE
+    return Flask.get_send_file_max_age(app, filename)
+
+app.get_send_file_max_age = _static_max_age
+
 # Configure logging level from environment
 import logging
 log_level = os.environ.get('LOG_LEVEL', 'INFO').upper()
@@ -65,13 +96,49 @@ app.config['CORE_SERVICE_URL'] = os.environ.get('CORE_SERVICE_URL')
 app.config['NEXUS_SERVICE_URL'] = os.environ.get('NEXUS_SERVICE_URL', 'http://localhost:8000')
 
 
+def load_services(path='services.json'):
+    """
+    Load services.json, reusing a marshal cache of the parsed dict.
+
+    Every gunicorn worker loads the config at boot; the cache in
+    services.json.marshal is keyed on the JSON file's mtime and size, so it is
+    rebuilt automatically whenever services.json changes.
+    """
+    import marshal
+    import orjson
+
+    stat = os.stat(path)  # Raises FileNotFoundError if services.json is missing
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cache_path = path + '.marshal'
+
+    try:
+        with open(cache_path, 'rb') as f:
+            cached_stamp, services = marshal.load(f)
+        if cached_stamp == stamp:
+            return services
+    except Exception:
+        pass  # Missing, stale-format or corrupt cache - reparse below
+
+    with open(path, 'rb') as f:
+        services = orjson.loads(f.read())
+
+    # Write via a temp file so concurrently booting workers never read a partial cache
+    try:
+        tmp_path = f"{cache_path}.{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            marshal.dump((stamp, services), f)
+        os.replace(tmp_path, cache_path)
+    except Exception:
+        pass  # Ignore write errors (read-only filesystem, etc.)
+
+    return services
+
+
 # Load services configuration from services.json
 try:
-    with open('services.json') as f:
-        services_config = json.load(f)
-        app.config['SERVICES'] = services_config
+    app.config['SERVICES'] = load_services()
 except FileNotFoundError:
-    print("WARNING: services.json not found. The proxy will not know about any backend services.")
+    app.logger.warning("services.json not found. The proxy will not know about any backend services.")
     app.config['SERVICES'] = {}
 
 # Initialize Helm logger for centralized logging
@@ -95,45 +162,43 @@ def inject_version():
     }
 
 # Register RFC 7807 error handlers for consistent API error responses
+from werkzeug.exceptions import HTTPException
 from app.error_responses import (
+    problem_detail,
     internal_server_error,
     not_found,
     bad_request,
     unauthorized,
     forbidden,
+    conflict,
+    unprocessable_entity,
+    rate_limit_exceeded,
     service_unavailable
 )
 
-@app.errorhandler(400)
-def handle_bad_request(e):
-    """Handle 400 Bad Request errors"""
-    return bad_request(detail=str(e))
-
-@app.errorhandler(401)
-def handle_unauthorized(e):
-    """Handle 401 Unauthorized errors"""
-    return unauthorized(detail=str(e))
-
-@app.errorhandler(403)
-def handle_forbidden(e):
-    """Handle 403 Forbidden errors"""
-    return forbidden(detail=str(e))
-
-@app.errorhandler(404)
-def handle_not_found(e):
-    """Handle 404 Not Found errors"""
-    return not_found(detail=str(e))
-
-@app.errorhandler(500)
-def handle_internal_error(e):
-    """Handle 500 Internal Server Error"""
-    app.logger.error(f"Internal server error: {e}")
-    return internal_server_error()
-
-@app.errorhandler(503)
-def handle_service_unavailable(e):
-    """Handle 503 Service Unavailable errors"""
-    return service_unavailable(detail=str(e))
+# Status code -> problem-detail builder, dispatched from one HTTPException handler
+_ERROR_HANDLERS = {
+    400: bad_request,
+    401: unauthorized,
+    403: forbidden,
+    404: not_found,
+    409: conflict,
+    422: unprocessable_entity,
+    429: rate_limit_exceeded,
+    503: service_unavailable
+}
+
+@app.errorhandler(HTTPException)
+def handle_http_exception(e):
+    """Render any HTTP error (abort(), 404 routing, rate limits...) as problem+json"""
+    if e.code == 500:
+        app.logger.error(f"Internal server error: {e}")
+        return internal_server_error()
+    handler = _ERROR_HANDLERS.get(e.code)
+    if handler is None:
+        # Other statuses (405, 413, ...) keep their own code and default title
+        return problem_detail(e.code, detail=str(e))
+    return handler(detail=str(e))
 
 @app.errorhandler(Exception)
 def handle_unexpected_error(e):
@@ -141,48 +206,53 @@ def handle_unexpected_error(e):
     app.logger.exception(f"Unexpected error: {e}")
     return internal_server_error(detail="An unexpected error occurred")
 
-# Configure OpenAPI/Swagger documentation
-from flasgger import Swagger
-
-swagger_config = {
-    "headers": [],
-    "specs": [
-        {
-            "endpoint": 'apispec',
-            "route": '/apispec.json',
-            "rule_filter": lambda rule: True,
-            "model_filter": lambda tag: True,
-        }
-    ],
-    "static_url_path": "/flasgger_static",
-    "swagger_ui": True,
-    "specs_route": "/docs"
-}
+# Configure OpenAPI/Swagger documentation (served at /docs)
+# flasgger pulls in jsonschema/YAML and walks every route at startup, so it is
+# only mounted when ENABLE_SWAGGER=true (e.g. in development)
+if os.environ.get('ENABLE_SWAGGER', 'false').lower() in ('true', '1', 'yes'):
+    from flasgger import Swagger
 
-swagger_template = {
-    "info": {
-        "title": f"{app.config.get('SERVICE_NAME', 'HiveMatrix')} API",
-        "description": "API documentation for HiveMatrix Nexus - HTTPS gateway and authentication proxy",
-        "version": VERSION
-    },
-    "securityDefinitions": {
-        "Bearer": {
-            "type": "apiKey",
-            "name": "Authorization",
-            "in": "header",
-            "description": "JWT Authorization header using the Bearer scheme. Example: 'Authorization: Bearer {token}'"
-        }
-    },
-    "security": [
-        {
-            "Bearer": []
-        }
-    ]
-}
+    swagger_config = {
+        "headers": [],
+        "specs": [
+            {
+                "endpoint": 'apispec',
+                "route": '/apispec.json',
+                "rule_filter": lambda rule: True,
+                "model_filter": lambda tag: True,
+            }
+        ],
+        "static_url_path": "/flasgger_static",
+        "swagger_ui": True,
+        "specs_route": "/docs"
+    }
+
+    swagger_template = {
+        "info": {
+            "title": f"{app.config.get('SERVICE_NAME', 'HiveMatrix')} API",
+            "description": "API documentation for HiveMatrix Nexus - HTTPS gateway and authentication proxy",
+            "version": VERSION
+        },
+        "securityDefinitions": {
+            "Bearer": {
+                "type": "apiKey",
+                "name": "Authorization",
+                "in": "header",
+                "description": "JWT Authorization header using the Bearer scheme. Example: 'Authorization: Bearer {token}'"
+            }
+        },
+        "security": [
+            {
+                "Bearer": []
+            }
+        ]
+    }
 
-Swagger(app, config=swagger_config, template=swagger_template)
+    Swagger(app, config=swagger_config, template=swagger_template)
 
 from app import routes
 
-# Log service startup
-helm_logger.info(f"{app.config['SERVICE_NAME']} service started")
+# Log service startup (only enqueued; the Helm token is fetched by the sender thread)
+# Set LOG_STARTUP=false to skip the per-worker startup entry
+if os.environ.get('LOG_STARTUP', 'true').lower() in ('true', '1', 'yes'):
+    helm_logger.info(f"{app.config['SERVICE_NAME']} service started")
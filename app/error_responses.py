@@ -2,10 +2,31 @@
 RFC 7807 Problem Details for HTTP APIs
 Provides standardized error response formatting across the application.
 """
-from flask import jsonify, request
+import orjson
+from flask import Response, request
 from werkzeug.http import HTTP_STATUS_CODES
 
 
+# Base problem objects keyed by (status, title, type_suffix), built once per
+# combination instead of on every error response. Seeded below with the
+# statuses the wrappers in this module use.
+_TEMPLATES = {}
+
+
+def _problem_template(status, title, type_suffix):
+    """Return the cached base problem dict for this status/title/type."""
+    key = (status, title, type_suffix)
+    template = _TEMPLATES.get(key)
+    if template is None:
+        template = _TEMPLATES[key] = {
+            "type": f"about:blank#{type_suffix}" if type_suffix else "about:blank",
+            # Default title to HTTP status phrase
+            "title": title if title is not None else HTTP_STATUS_CODES.get(status, "Error"),
+            "status": status
+        }
+    return template
+
+
 def problem_detail(status, title=None, detail=None, type_suffix=None, instance=None, **extra):
     """
     Create an RFC 7807 Problem Details response.
@@ -21,16 +42,8 @@ def problem_detail(status, title=None, detail=None, type_suffix=None, instance=N
     Returns:
         Flask JSON response with appropriate status code
     """
-    # Default title to HTTP status phrase
-    if title is None:
-        title = HTTP_STATUS_CODES.get(status, "Error")
-
-    # Build problem details object
-    problem = {
-        "type": f"about:blank#{type_suffix}" if type_suffix else "about:blank",
-        "title": title,
-        "status": status
-    }
+    # Build problem details object from the cached base
+    problem = _problem_template(status, title, type_suffix).copy()
 
     if detail:
         problem["detail"] = detail
@@ -43,11 +56,13 @@ def problem_detail(status, title=None, detail=None, type_suffix=None, instance=N
     # Add any extra fields
     problem.update(extra)
 
-    response = jsonify(problem)
-    response.status_code = status
-    response.headers["Content-Type"] = "application/problem+json"
-
-    return response
+    # Serialize with orjson and set the problem+json type up front rather than
+    # going through jsonify() and then overwriting its Content-Type
+    return Response(
+        orjson.dumps(problem, default=str),
+        status=status,
+        mimetype="application/problem+json"
+    )
 
 
 def bad_request(detail=None, **extra):
@@ -161,3 +176,17 @@ def service_unavailable(detail=None, retry_after=None, **extra):
     if retry_after:
         response.headers["Retry-After"] = str(retry_after)
     return response
+
+
+for _status, _title, _type_suffix in (
+    (400, "Bad Request", "bad-request"),
+    (401, "Unauthorized", "unauthorized"),
+    (403, "Forbidden", "forbidden"),
+    (404, "Not Found", "not-found"),
+    (409, "Conflict", "conflict"),
+    (422, "Unprocessable Entity", "unprocessable-entity"),
+    (429, "Too Many Requests", "rate-limit-exceeded"),
+    (500, "Internal Server Error", "internal-server-error"),
+    (503, "Service Unavailable", "service-unavailable"),
+):
+    _problem_template(_status, _title, _type_suffix)
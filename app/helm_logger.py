@@ -5,16 +5,30 @@ This logger sends logs to the Helm service for centralized viewing and analysis.
 It maintains a background thread that batches and sends logs periodically.
 """
 
+import copy
 import os
 import logging
+import logging.handlers
 import requests
 import threading
 import time
 import queue
 import jwt
-from datetime import datetime
+import orjson
 from typing import Optional, Dict, Any
 from flask import has_request_context, request, g
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# HelmLogger's own diagnostics. Kept off the root/Flask loggers (and away from
+# HelmLogHandler) so failures to reach Helm during an outage are never fed back
+# into the queue they are reporting on.
+_log = logging.getLogger('helm_logger.internal')
+_log.propagate = False
+if not _log.handlers:
+    _stderr_handler = logging.StreamHandler()
+    _stderr_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [helm_logger] %(message)s'))
+    _log.addHandler(_stderr_handler)
 
 class HelmLogHandler(logging.Handler):
     """Custom logging handler that sends logs to Helm via HelmLogger"""
@@ -39,18 +53,64 @@ class HelmLogHandler(logging.Handler):
             # Format the message
             message = self.format(record)
 
-            # Send to Helm
-            self.helm_logger.log(level, message)
+            # Send to Helm, keeping the request fields captured on the request thread
+            self.helm_logger.log(level, message, request_info=getattr(record, 'helm_request', None))
         except Exception:
             self.handleError(record)
 
+class HelmQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that snapshots Flask request fields before enqueueing.
+
+    Records are handed to HelmLogHandler on a QueueListener thread, where no
+    request context exists, so path/method/user must be captured here.
+    Unlike QueueHandler.prepare, the record is not formatted here: merging
+    args into the message and rendering tracebacks is left to HelmLogHandler.
+    """
+
+    def prepare(self, record):
+        # Copied so the other handlers of this record never see helm_request
+        record = copy.copy(record)
+        if has_request_context():
+            record.helm_request = _capture_request_info()
+        return record
+
+# (whole UTC second, "YYYY-MM-DDTHH:MM:SS") shared by every log in that second
+_ts_cache = (0, '')
+
+def _utc_timestamp():
+    """
+    Return the current UTC time as ISO-8601 with microseconds,
+    e.g. 2024-11-19T14:30:00.123456.
+
+    Only the microsecond suffix is formatted per call; the date/time prefix
+    is reformatted once per second.
+    """
+    global _ts_cache
+    sec, micros = divmod(time.time_ns() // 1000, 1_000_000)
+    cached_sec, prefix = _ts_cache
+    if sec != cached_sec:
+        prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(sec))
+        _ts_cache = (sec, prefix)
+    return f"{prefix}.{micros:06d}"
+
+def _capture_request_info():
+    """Return (trace_id, user_id, path, method) for the current request."""
+    return (
+        getattr(g, 'trace_id', None),
+        getattr(g, 'user', {}).get('sub'),
+        request.path,
+        request.method
+    )
+
 class HelmLogger:
     """
     A logging handler that sends logs to the Helm service.
     Buffers logs and sends them in batches to reduce network overhead.
     """
 
-    def __init__(self, service_name: str, helm_url: str = None, batch_size: int = 10, flush_interval: int = 5):
+    def __init__(self, service_name: str, helm_url: str = None, batch_size: int = 10, flush_interval: int = 5,
+                 max_queue: int = 10000):
         """
         Initialize the Helm logger.
 
@@ -59,16 +119,37 @@ class HelmLogger:
             helm_url: URL of the Helm service (defaults to HELM_SERVICE_URL env var)
             batch_size: Number of logs to batch before sending
             flush_interval: Seconds between automatic flushes
+            max_queue: Maximum queued logs; further logs are dropped (and counted)
+                until Helm catches up, so an outage can't grow memory without bound
         """
         self.service_name = service_name
         self.helm_url = helm_url or os.environ.get('HELM_SERVICE_URL', 'http://localhost:5004')
         self.batch_size = batch_size
         self.flush_interval = flush_interval
 
-        self.log_queue = queue.Queue()
+        self.log_queue = queue.Queue(max_queue)
+        self.dropped = 0  # Logs discarded because the queue was full or a send failed
+        self._dropped_lock = threading.Lock()  # Request threads and the sender both update dropped
+        self.failure_count = 0  # Consecutive failed sends
+        self.retry_at = 0  # Unix timestamp before which no send is attempted
         self.stop_event = threading.Event()
+        self.listener = None  # QueueListener feeding captured Flask/werkzeug logs
         self.token = None
         self.token_expires_at = 0  # Unix timestamp when token expires
+        self.auth_headers = {}  # Built once per token instead of per batch
+
+        # Keep-alive session so batches reuse one socket to Helm/Core instead of
+        # reconnecting every flush. Only connection errors are retried, since
+        # re-sending a POST that reached Helm would duplicate logs.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=4,
+            max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.5)
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Connection': 'keep-alive'})
 
         # Start background thread for sending logs
         self.sender_thread = threading.Thread(target=self._send_loop, daemon=True)
@@ -87,58 +168,81 @@ class HelmLogger:
         # Token is missing, expired, or expiring soon - fetch a new one
         core_url = os.environ.get('CORE_SERVICE_URL', 'http://localhost:5000')
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{core_url}/service-token",
-                json={
+                data=orjson.dumps({
                     "calling_service": self.service_name,
                     "target_service": "helm"
-                },
-                timeout=5
+                }),
+                headers={"Content-Type": "application/json"},
+                # Only ever called from the sender thread; a short connect timeout
+                # keeps a Core that isn't up yet from stalling the first flush
+                timeout=(1, 5)
             )
             if response.status_code == 200:
-                self.token = response.json().get('token')
+                self.token = orjson.loads(response.content).get('token')
+                self.auth_headers = {
+                    "Authorization": f"Bearer {self.token}",
+                    "Content-Type": "application/json"
+                }
 
                 # Decode token to get expiration time
                 try:
                     decoded = jwt.decode(self.token, options={"verify_signature": False})
                     self.token_expires_at = decoded.get('exp', 0)
                 except Exception as e:
-                    logging.error(f"Failed to decode service token for expiration: {e}")
+                    _log.error(f"Failed to decode service token for expiration: {e}")
                     # Set a default expiration of 1 hour if we can't decode
                     self.token_expires_at = current_time + 3600
 
                 return self.token
         except Exception as e:
-            logging.error(f"Failed to get service token: {e}")
+            _log.error(f"Failed to get service token: {e}")
         return None
 
-    def _send_batch(self, logs: list):
-        """Send a batch of logs to Helm"""
+    def _send_batch(self, logs: list) -> bool:
+        """Send a batch of logs to Helm. Returns True if Helm accepted it."""
         if not logs:
-            return
+            return True
 
         token = self._get_service_token()
         if not token:
-            logging.error("No service token available, cannot send logs to Helm")
-            return
+            _log.error("No service token available, cannot send logs to Helm")
+            return False
 
         try:
-            response = requests.post(
+            # orjson is much cheaper than the stdlib encoder behind requests' json=;
+            # default=str keeps odd context values from dropping the whole batch
+            body = orjson.dumps({
+                "service_name": self.service_name,
+                "logs": logs
+            }, default=str)
+            response = self.session.post(
                 f"{self.helm_url}/api/logs/ingest",
-                json={
-                    "service_name": self.service_name,
-                    "logs": logs
-                },
-                headers={"Authorization": f"Bearer {token}"},
+                data=body,
+                headers=self.auth_headers,
                 timeout=5
             )
+            if response.status_code == 200:
+                self._report_dropped()
+                return True
             if response.status_code == 401:
                 self.token = None  # Clear cached token so it gets refreshed
-                logging.error(f"Failed to send logs to Helm: {response.status_code} {response.text}")
-            elif response.status_code != 200:
-                logging.error(f"Failed to send logs to Helm: {response.status_code} {response.text}")
+            _log.error(f"Failed to send logs to Helm: {response.status_code} {response.text}")
         except Exception as e:
-            logging.error(f"Error sending logs to Helm: {e}")
+            _log.error(f"Error sending logs to Helm: {e}")
+        return False
+
+    def _count_dropped(self, count):
+        with self._dropped_lock:
+            self.dropped += count
+
+    def _report_dropped(self):
+        """Once Helm is reachable again, log how many entries were dropped during the outage."""
+        with self._dropped_lock:
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            self.warning(f"Dropped {dropped} log entries while Helm was unreachable")
 
     def _send_loop(self):
         """Background thread that batches and sends logs"""
@@ -147,28 +251,50 @@ class HelmLogger:
 
         while not self.stop_event.is_set():
             try:
+                # Circuit open after failed sends: leave logs in the (bounded) queue
+                # until the backoff expires instead of hammering a dead Helm
+                backoff_remaining = self.retry_at - time.time()
+                if backoff_remaining > 0:
+                    self.stop_event.wait(min(backoff_remaining, 1))
+                    continue
+
                 # Try to get a log from the queue with timeout
                 try:
                     log_entry = self.log_queue.get(timeout=1)
                     batch.append(log_entry)
                 except queue.Empty:
                     pass
+                else:
+                    # Drain whatever else is already waiting without blocking,
+                    # so a burst fills the batch in one wake-up
+                    while len(batch) < self.batch_size:
+                        try:
+                            batch.append(self.log_queue.get_nowait())
+                        except queue.Empty:
+                            break
 
                 # Send batch if it's full or enough time has passed
                 now = time.time()
                 if len(batch) >= self.batch_size or (batch and now - last_flush >= self.flush_interval):
-                    self._send_batch(batch)
+                    if self._send_batch(batch):
+                        self.failure_count = 0
+                        self.retry_at = 0
+                    else:
+                        # Back off exponentially: 2s, 4s, 8s ... capped at 5 minutes
+                        self._count_dropped(len(batch))
+                        self.failure_count += 1
+                        self.retry_at = time.time() + min(2 ** self.failure_count, 300)
                     batch = []
                     last_flush = now
 
             except Exception as e:
-                logging.error(f"Error in log sender thread: {e}")
+                _log.error(f"Error in log sender thread: {e}")
 
         # Send any remaining logs before shutting down
         if batch:
             self._send_batch(batch)
 
-    def log(self, level: str, message: str, context: Dict[str, Any] = None):
+    def log(self, level: str, message: str, context: Dict[str, Any] = None, request_info: tuple = None):
         """
         Add a log entry to the queue.
 
@@ -176,22 +302,30 @@ class HelmLogger:
             level: Log level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
             message: Log message
             context: Optional dictionary with additional context
+            request_info: Pre-captured (trace_id, user_id, path, method); defaults to
+                the current request when called from a request thread
         """
         log_entry = {
             "level": level.upper(),
             "message": message,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": _utc_timestamp(),
             "context": context or {}
         }
 
         # Add request context if available
-        if has_request_context():
-            log_entry["trace_id"] = getattr(g, 'trace_id', None)
-            log_entry["user_id"] = getattr(g, 'user', {}).get('sub')
-            log_entry["context"]["path"] = request.path
-            log_entry["context"]["method"] = request.method
+        if request_info is None and has_request_context():
+            request_info = _capture_request_info()
+        if request_info:
+            trace_id, user_id, path, method = request_info
+            log_entry["trace_id"] = trace_id
+            log_entry["user_id"] = user_id
+            log_entry["context"]["path"] = path
+            log_entry["context"]["method"] = method
 
-        self.log_queue.put(log_entry)
+        try:
+            self.log_queue.put_nowait(log_entry)
+        except queue.Full:
+            self._count_dropped(1)
 
     def debug(self, message: str, context: Dict[str, Any] = None):
         """Log a DEBUG message"""
@@ -215,8 +349,11 @@ class HelmLogger:
 
     def shutdown(self):
         """Shutdown the logger and flush remaining logs"""
+        if self.listener:
+            self.listener.stop()
         self.stop_event.set()
         self.sender_thread.join(timeout=10)
+        self.session.close()
 
 
 # Global logger instance
@@ -236,9 +373,13 @@ def init_helm_logger(service_name: str, helm_url: str = None, capture_flask_logs
 
     # Optionally capture Flask/werkzeug logs
     if capture_flask_logs:
-        # Add handler to Flask's app logger
-        handler = HelmLogHandler(_helm_logger)
+        # Request threads only copy and enqueue the record; HelmLogHandler
+        # formats it on the QueueListener thread
+        record_queue = queue.Queue(-1)
+        handler = HelmQueueHandler(record_queue)
         handler.setLevel(logging.INFO)
+        _helm_logger.listener = logging.handlers.QueueListener(record_queue, HelmLogHandler(_helm_logger))
+        _helm_logger.listener.start()
 
         # Capture werkzeug (Flask's HTTP server) logs
         werkzeug_logger = logging.getLogger('werkzeug')
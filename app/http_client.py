@@ -0,0 +1,110 @@
+"""
+Shared outbound HTTP sessions for HiveMatrix Nexus.
+
+Each upstream gets one module-level requests.Session per worker process, so
+repeat calls reuse keep-alive connections instead of opening a new TCP (and
+TLS) connection per request.
+
+The sessions are shared by every user's requests, so they never store cookies
+returned by upstreams; callers pass per-request cookies explicitly.
+
+Under gunicorn's gevent workers the sockets are cooperative, so a request
+waiting on an upstream only parks its own greenlet; pool_maxsize bounds how
+many upstream connections a worker keeps open at once, not its concurrency.
+"""
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Retry once if connecting fails (e.g. a backend mid-restart). Nothing that
+# happens after the request is sent is retried, so a request is never sent
+# twice: no read/other errors, no redirects, and Retry-After on a 413/429/503
+# is ignored (urllib3 would otherwise sleep for it, uncapped, and resend).
+# status is left unset: status=0 would turn a plain 503 into MaxRetryError
+CONNECT_RETRY = Retry(total=1, connect=1, read=False, other=0, redirect=False,
+                      respect_retry_after_header=False)
+
+
+class CircuitBreakerAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that stops calling its upstream for a while once it keeps failing.
+
+    After fail_max consecutive connection failures (refused, unreachable,
+    connect timeouts), requests fail immediately with ConnectionError for
+    reset_timeout seconds instead of each waiting out its own timeout. After
+    that one request is let through as a probe while the others keep failing
+    fast; a probe that reaches the upstream closes the circuit, a failed one
+    reopens it. Read timeouts mean the upstream is up but slow, so they never
+    count as failures.
+    """
+
+    def __init__(self, fail_max=5, reset_timeout=30, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()  # Shared by every thread/greenlet using the session
+        self._failures = 0
+        self._open_until = 0.0
+        self._probing = False
+
+    def send(self, request, **kwargs):
+        with self._lock:
+            probe = self._failures >= self.fail_max
+            if probe and (self._probing or time.monotonic() < self._open_until):
+                raise requests.exceptions.ConnectionError(
+                    f"Circuit open after {self._failures} consecutive failures: {request.url}", request=request)
+            if probe:
+                self._probing = True
+
+        failed = False
+        try:
+            return super().send(request, **kwargs)
+        except requests.exceptions.ConnectionError:
+            # Includes ConnectTimeout; ReadTimeout is not a ConnectionError
+            failed = True
+            raise
+        finally:
+            self._record_result(failed, probe)
+
+    def _record_result(self, failed, probe):
+        with self._lock:
+            if probe:
+                self._probing = False
+            if failed:
+                self._failures += 1
+                if self._failures >= self.fail_max:
+                    self._open_until = time.monotonic() + self.reset_timeout
+            else:
+                self._failures = 0
+
+
+def _make_session(pool_connections, pool_maxsize, max_retries=0, adapter_class=HTTPAdapter):
+    """Build a pooled session that refuses to persist response cookies."""
+    session = requests.Session()
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = adapter_class(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=max_retries)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# Core: token validation, login exchange, revocation and service-token minting
+# No retry: validate_token's short timeout decides when to fall back. While
+# Core is down the circuit breaker sends callers straight to their fallback.
+core_session = _make_session(pool_connections=4, pool_maxsize=64, adapter_class=CircuitBreakerAdapter)
+
+# Keycloak: /keycloak/* proxy
+keycloak_session = _make_session(pool_connections=4, pool_maxsize=64, max_retries=CONNECT_RETRY)
+
+# Backend services: the main_gateway proxy and service_client.call_service (Codex etc.)
+service_session = _make_session(pool_connections=32, pool_maxsize=64, max_retries=CONNECT_RETRY)
+
+# The urllib3 pool behind service_session. main_gateway forwards headers,
+# cookies and bodies verbatim, so it calls this directly and skips requests'
+# per-call Request/PreparedRequest/cookie-jar work; connections stay shared
+# with service_session. Callers pass retries=CONNECT_RETRY and redirect=False.
+service_pool = service_session.get_adapter('http://').poolmanager
@@ -0,0 +1,52 @@
+"""
+orjson-backed JSON provider for Flask.
+
+Used for jsonify(), request.get_json() and every other app.json call. Output
+matches Flask's DefaultJSONProvider: datetimes are still HTTP dates, other
+unsupported types go through Flask's default() hook, and sort_keys is honoured.
+"""
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+# Hand datetimes to Flask's default() so they stay RFC 822 dates (orjson would emit ISO-8601)
+_BASE_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+# The only dumps() keyword arguments orjson output already satisfies
+_COMPACT = {'separators': (',', ':')}
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """DefaultJSONProvider with orjson doing the encoding and decoding."""
+
+    def _encode(self, obj, option=0):
+        option |= _BASE_OPTIONS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        # Compact separators are orjson's own output (the session serializer
+        # asks for them); pretty-printing (indent=...) and other stdlib-only
+        # options keep the stdlib path
+        if kwargs and kwargs != _COMPACT:
+            return super().dumps(obj, **kwargs)
+        return self._encode(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """
+        Build a JSON response (used by jsonify) with orjson.
+
+        DefaultJSONProvider.response() always passes separators= or indent=
+        to dumps(), which would send every response down the stdlib path;
+        this encodes straight to bytes with the same compact/indent choice.
+        """
+        obj = self._prepare_response_obj(args, kwargs)
+        option = 0
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option = orjson.OPT_INDENT_2
+        return self._app.response_class(self._encode(obj, option) + b"\n", mimetype=self.mimetype)
@@ -7,6 +7,13 @@ for more accurate rate limiting. Falls back to IP address for unauthenticated re
 from flask import g, has_request_context
 from flask_limiter.util import get_remote_address
 
+_USER_PREFIX = "user:"
+_IP_PREFIX = "ip:"
+
+# remote address -> "ip:<address>", so repeat clients reuse the same key string
+_ip_keys = {}
+_IP_KEYS_MAX = 4096
+
 
 def get_user_id_or_ip():
     """
@@ -27,10 +34,23 @@ def get_user_id_or_ip():
         return "127.0.0.1"  # Default for background tasks
 
     # Try to get user ID from JWT token in Flask g object
-    if hasattr(g, 'user') and g.user and isinstance(g.user, dict):
-        user_id = g.user.get('sub')
+    try:
+        user_id = g.user['sub']
         if user_id:
-            return f"user:{user_id}"
-
-    # Fall back to IP address for unauthenticated requests
-    return f"ip:{get_remote_address()}"
+            return _USER_PREFIX + str(user_id)
+    except (AttributeError, KeyError, TypeError):
+        pass
+
+    # Fall back to IP address for unauthenticated requests. Flask-Limiter calls
+    # this once per limit, so remember the key for the rest of the request
+    # rather than re-deriving the remote address each time.
+    key = g.get('_rl_key')
+    if key is None:
+        addr = get_remote_address()
+        key = _ip_keys.get(addr)
+        if key is None:
+            if len(_ip_keys) >= _IP_KEYS_MAX:
+                _ip_keys.clear()
+            key = _ip_keys[addr] = _IP_PREFIX + str(addr)
+        g._rl_key = key
+    return key
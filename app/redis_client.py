@@ -0,0 +1,38 @@
+"""
+Shared Redis connection pool for HiveMatrix Nexus.
+
+Every Redis consumer in a worker process (rate limiting, shared caches) draws
+connections from the same ConnectionPool, so a gunicorn worker holds a bounded
+number of sockets no matter how many features use Redis.
+
+Redis is optional: when REDIS_URI is not set, get_redis() returns None and
+callers fall back to their in-process behaviour.
+"""
+import os
+
+try:
+    import redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+# e.g. redis://localhost:6379/0
+REDIS_URI = os.environ.get('REDIS_URI')
+
+_pool = None
+
+
+def get_redis_pool():
+    """Return the process-wide Redis ConnectionPool, or None if Redis is not configured."""
+    global _pool
+    if _pool is None and REDIS_URI and HAS_REDIS:
+        _pool = redis.ConnectionPool.from_url(REDIS_URI)
+    return _pool
+
+
+def get_redis():
+    """Return a Redis client bound to the shared pool, or None if Redis is not configured."""
+    pool = get_redis_pool()
+    if pool is None:
+        return None
+    return redis.Redis(connection_pool=pool)
@@ -0,0 +1,124 @@
+"""
+Redis-backed server-side sessions for HiveMatrix Nexus.
+
+Enabled with SESSION_STORE=redis (REDIS_URI must also be set). The session
+cookie then carries only a random session id; the session data (token, user,
+OAuth state) lives in Redis under session:<id>, shared by every gunicorn
+worker and Nexus instance. Data is serialized the same way Flask's default
+cookie sessions are, so existing session code is unchanged.
+"""
+import secrets
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+from app.redis_client import get_redis
+
+# Ids are secrets.token_urlsafe(32): 43 URL-safe characters
+_SID_MAX_LENGTH = 64
+
+
+def _new_sid():
+    return secrets.token_urlsafe(32)
+
+
+class RedisSession(CallbackDict, SessionMixin):
+    """Session dict that remembers its Redis id and whether it changed."""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.stale_sid = None  # Stored id to delete on save, set by regenerate()
+
+    def regenerate(self):
+        """
+        Move the session to a new id, e.g. on login.
+
+        The data is kept; the entry under the old id is deleted when the
+        session is saved, so an id planted before login is useless after it.
+        """
+        if not self.new:
+            self.stale_sid = self.sid
+        self.sid = _new_sid()
+        self.new = True
+        self.modified = True
+
+
+class RedisSessionInterface(SessionInterface):
+    """Keep session data in Redis and only a session id in the cookie."""
+
+    key_prefix = 'session:'
+    serializer = TaggedJSONSerializer()
+
+    def _new_session(self):
+        return RedisSession(sid=_new_sid(), new=True)
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid or len(sid) > _SID_MAX_LENGTH:
+            return self._new_session()
+
+        try:
+            data = get_redis().get(self.key_prefix + sid)
+        except Exception as e:
+            app.logger.warning(f"Failed to load session from Redis: {e}")
+            data = None
+
+        if data is None:
+            return self._new_session()
+        try:
+            return RedisSession(self.serializer.loads(data), sid=sid)
+        except Exception:
+            return self._new_session()  # Unreadable entry - start a fresh session
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if session.stale_sid:
+            try:
+                get_redis().delete(self.key_prefix + session.stale_sid)
+            except Exception as e:
+                app.logger.warning(f"Failed to delete session from Redis: {e}")
+
+        # Emptied session (logout): drop the Redis entry and the cookie
+        if not session:
+            if session.modified:
+                if not session.new:
+                    try:
+                        get_redis().delete(self.key_prefix + session.sid)
+                    except Exception as e:
+                        app.logger.warning(f"Failed to delete session from Redis: {e}")
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+            return
+
+        if session.modified or session.new:
+            try:
+                get_redis().setex(self.key_prefix + session.sid, app.permanent_session_lifetime,
+                                  self.serializer.dumps(dict(session)))
+            except Exception as e:
+                app.logger.warning(f"Failed to save session to Redis: {e}")
+                return
+
+        # The id only changes through regenerate() (which marks the session
+        # new), so the cookie is only (re)sent when it is new or a permanent
+        # session's expiry needs refreshing
+        if session.new or (session.permanent and app.config['SESSION_REFRESH_EACH_REQUEST']):
+            response.set_cookie(name, session.sid, expires=self.get_expiration_time(app, session),
+                                httponly=httponly, domain=domain, path=path, secure=secure,
+                                samesite=samesite)
+            response.vary.add('Cookie')
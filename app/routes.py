@@ -1,16 +1,24 @@
 import os
 import re
+import hashlib
 import requests
 import secrets
 import time
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from urllib.parse import urlencode
 
-from flask import request, Response, url_for, session, redirect, current_app, make_response
+from flask import request, Response, url_for, session, redirect, current_app, g, copy_current_request_context, jsonify
 from app import app, limiter
 from app.service_client import call_service
-from bs4 import BeautifulSoup
+from app.http_client import CONNECT_RETRY, core_session, keycloak_session, service_pool
+from app.redis_client import get_redis
+from app.version import VERSION
 import jwt
+import orjson
+import urllib3
 
 # Health check library
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -19,50 +27,200 @@ from health_check import HealthChecker
 # Cache TTL for user preferences (5 minutes)
 PREFERENCE_CACHE_TTL = 300
 
+# Keycloak settings, read once (.flaskenv is loaded before routes are imported)
+# KEYCLOAK_BACKEND_URL is the server-side URL; KEYCLOAK_SERVER_URL the frontend one
+KEYCLOAK_BACKEND_URL = os.environ.get('KEYCLOAK_BACKEND_URL', 'http://localhost:8080')
+KEYCLOAK_SERVER_URL = os.environ.get('KEYCLOAK_SERVER_URL', 'http://localhost:8080')
+KEYCLOAK_REALM = os.environ.get('KEYCLOAK_REALM', 'hivematrix')
+KEYCLOAK_CLIENT_ID = os.environ.get('KEYCLOAK_CLIENT_ID', 'core-client')
+KEYCLOAK_CLIENT_SECRET = os.environ.get('KEYCLOAK_CLIENT_SECRET')
+
+# Backend services from services.json (only read at startup)
+SERVICES = app.config.get('SERVICES', {})
+
+# Domain/Path attributes of Keycloak Set-Cookie headers, rewritten in one pass
+_COOKIE_SCOPE_RE = re.compile(r'; (Domain|Path)=[^;]+')
+
+def _rescope_keycloak_cookie(match):
+    """Drop Domain and point Path at the /keycloak proxy prefix."""
+    return '' if match.group(1) == 'Domain' else '; Path=/keycloak'
+
 # Cache for Core's public key to avoid fetching it on every request
 jwks_client = None
+_jwks_refresher_pid = None
+
+# The JWKS is re-fetched in the background this often, so a key rotation is
+# normally picked up before a request sees the new kid. The in-client cache
+# lifespan is longer so requests never block on a routine expiry.
+JWKS_REFRESH_INTERVAL = 900
+JWKS_CACHE_LIFESPAN = 3600
+
+def _refresh_jwks_loop(client):
+    """Background thread: load the JWKS, then keep the cache warm."""
+    if client.jwk_set_cache.get() is None:
+        try:
+            client.fetch_data()
+        except Exception as e:
+            app.logger.warning("Initial JWKS fetch failed: %s", e)
+    while True:
+        time.sleep(JWKS_REFRESH_INTERVAL)
+        previous = client.jwk_set_cache.jwk_set_with_timestamp
+        try:
+            client.fetch_data()  # Replaces the cached key set on success
+            _signing_keys.clear()  # Re-resolve keys against the new set
+        except Exception as e:
+            # fetch_data() clears the cache on failure; keep serving the old keys
+            client.jwk_set_cache.jwk_set_with_timestamp = previous
+            app.logger.warning("Background JWKS refresh failed: %s", e)
 
 def get_jwks_client():
-    """Initializes and returns the JWKS client."""
-    global jwks_client
+    """
+    Initializes and returns the JWKS client.
+
+    Keys are cached per kid; an unknown kid still triggers one synchronous
+    refresh and retry inside PyJWKClient.get_signing_key().
+    """
+    global jwks_client, _jwks_refresher_pid
     if jwks_client is None:
-        core_url = current_app.config['CORE_SERVICE_URL']
-        jwks_client = jwt.PyJWKClient(f"{core_url}/.well-known/jwks.json")
+        core_url = app.config['CORE_SERVICE_URL']
+        jwks_client = jwt.PyJWKClient(
+            f"{core_url}/.well-known/jwks.json",
+            cache_keys=True,
+            max_cached_keys=16,
+            lifespan=JWKS_CACHE_LIFESPAN
+        )
+    # Threads don't survive fork, so each gunicorn worker runs its own refresher
+    if _jwks_refresher_pid != os.getpid():
+        _jwks_refresher_pid = os.getpid()
+        threading.Thread(target=_refresh_jwks_loop, args=(jwks_client,), daemon=True).start()
     return jwks_client
 
+# Signing key per JWT header segment ({alg, kid, typ} is the same for every
+# token signed with one key), so new tokens skip the header decode and the
+# JWKS lookup. Cleared on each background JWKS refresh.
+SIGNING_KEY_CACHE_MAX = 32
+_signing_keys = {}
+
+def _signing_key_for(token):
+    """Return the public key that should have signed token."""
+    header = token.partition('.')[0]
+    key = _signing_keys.get(header)
+    if key is None:
+        key = get_jwks_client().get_signing_key_from_jwt(token).key
+        if len(_signing_keys) >= SIGNING_KEY_CACHE_MAX:
+            _signing_keys.clear()
+        _signing_keys[header] = key
+    return key
+
+# Start loading Core's keys as the worker boots, so the first login or
+# request doesn't wait on the JWKS round trip
+if app.config.get('CORE_SERVICE_URL'):
+    get_jwks_client()
+
+# Tokens whose signature has been verified:
+#   {blake2b(token): (decoded_data, expires_at, confirmed_until)}
+# The RS256 verify runs once per token; entries live until the token's exp.
+# Core's revocation answer is trusted for VALIDATED_TOKEN_TTL seconds, so a
+# revoked token is still accepted until then, after which Core is asked again.
+VALIDATED_TOKEN_TTL = 60
+VALIDATED_TOKEN_CACHE_MAX = 10000
+_validated_tokens = {}
+# Serializes inserts, whose eviction sweep iterates the dict; lookups and
+# pops are single dict operations and need no lock
+_validated_tokens_lock = threading.Lock()
+# Per-process key, so cache keys can't be precomputed from a captured token
+_TOKEN_HASH_KEY = secrets.token_bytes(32)
+
+def _token_cache_key(token):
+    """Hash the raw token so the cache never holds usable bearer tokens."""
+    return hashlib.blake2b(token.encode(), digest_size=16, key=_TOKEN_HASH_KEY).digest()
+
+def _get_validated_token(key):
+    """
+    Return (decoded_data, confirmed) for a cached token.
+
+    decoded_data is None if the token isn't cached or has expired; confirmed is
+    True while Core's last answer for it is still fresh.
+    """
+    entry = _validated_tokens.get(key)
+    if entry is None:
+        return None, False
+    data, expires_at, confirmed_until = entry
+    now = time.time()
+    if now >= expires_at:
+        _validated_tokens.pop(key, None)
+        return None, False
+    return data, now < confirmed_until
+
+def _cache_validated_token(key, data):
+    """Cache decoded data for a token Core just confirmed."""
+    now = time.time()
+    expires_at = data.get('exp', now)
+    if expires_at <= now:
+        return
+    with _validated_tokens_lock:
+        if len(_validated_tokens) >= VALIDATED_TOKEN_CACHE_MAX:
+            # Drop expired entries; if that frees nothing, start over
+            for stale_key in [k for k, (_, exp, _) in list(_validated_tokens.items()) if exp <= now]:
+                _validated_tokens.pop(stale_key, None)
+            if len(_validated_tokens) >= VALIDATED_TOKEN_CACHE_MAX:
+                _validated_tokens.clear()
+        _validated_tokens[key] = (data, expires_at, min(expires_at, now + VALIDATED_TOKEN_TTL))
+
+# JSON request bodies are encoded with orjson and sent as data= with this header
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# Sends the Core revocation check while the request thread verifies the JWT
+_validation_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='core-validate')
+
 def validate_token(token):
     """
     Validates a JWT token by checking with Core.
     This ensures the session hasn't been revoked.
     Returns the decoded data if valid, None otherwise.
+
+    Tokens Core has confirmed are cached for up to VALIDATED_TOKEN_TTL seconds;
+    after that only the Core check is repeated, not the signature verify.
     """
+    cache_key = _token_cache_key(token)
+    data, confirmed = _get_validated_token(cache_key)
+    if confirmed:
+        return data
+
+    # Ask Core whether the session is still valid (not revoked) while the
+    # signature is verified locally; neither depends on the other
+    core_url = current_app.config['CORE_SERVICE_URL']
+    core_check = _validation_executor.submit(
+        core_session.post,
+        f"{core_url}/api/token/validate",
+        data=orjson.dumps({'token': token}),
+        headers=_JSON_HEADERS,
+        timeout=(0.5, 2)  # Core is on the LAN: a slow connect means it's down
+    )
+
     try:
-        # First verify signature locally
-        client = get_jwks_client()
-        signing_key = client.get_signing_key_from_jwt(token)
-        data = jwt.decode(
-            token,
-            signing_key.key,
-            algorithms=["RS256"],
-            issuer="hivematrix-core",
-            options={"verify_exp": True}
-        )
+        # Verify signature locally (already done if the token is cached)
+        if data is None:
+            data = jwt.decode(
+                token,
+                _signing_key_for(token),
+                algorithms=["RS256"],
+                issuer="hivematrix-core",
+                options={"verify_exp": True}
+            )
 
-        # Then check with Core if session is still valid (not revoked)
-        core_url = current_app.config['CORE_SERVICE_URL']
+        # Then use Core's answer
         try:
-            validation_response = requests.post(
-                f"{core_url}/api/token/validate",
-                json={'token': token},
-                timeout=2
-            )
+            validation_response = core_check.result()
 
             if validation_response.status_code == 200:
                 # Session is valid
+                _cache_validated_token(cache_key, data)
                 return data
             else:
                 # Session revoked or invalid
-                current_app.logger.warning(f"Token validation failed at Core: {validation_response.status_code}")
+                _validated_tokens.pop(cache_key, None)
+                current_app.logger.warning("Token validation failed at Core: %s", validation_response.status_code)
                 return None
         except requests.exceptions.RequestException as e:
             # If Core is unreachable, fall back to local validation with restrictions
@@ -75,277 +233,353 @@ def validate_token(token):
 
             if token_age_seconds > max_fallback_age:
                 current_app.logger.warning(
-                    f"Core unreachable and token too old for fallback ({token_age_seconds:.0f}s > {max_fallback_age}s)"
+                    "Core unreachable and token too old for fallback (%.0fs > %ss)", token_age_seconds, max_fallback_age
                 )
                 return None
 
             current_app.logger.warning(
-                f"Could not reach Core for validation: {e}, accepting recent token (age: {token_age_seconds:.0f}s)"
+                "Could not reach Core for validation: %s, accepting recent token (age: %.0fs)", e, token_age_seconds
             )
             return data
 
     except jwt.ExpiredSignatureError:
         return None
     except jwt.PyJWTError as e:
-        current_app.logger.warning(f"Token validation failed: {e}")
+        current_app.logger.warning("Token validation failed: %s", e)
         return None
 
 
-def get_user_theme(token_data):
-    """
-    Fetch user's theme preferences from Codex with session caching.
-    Falls back to defaults if Codex is unavailable or user not found.
+# Runs the second Codex preference lookup while the request thread does the first
+_preference_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='codex-prefs')
 
-    Args:
-        token_data: Decoded JWT token containing user info
+VALID_THEMES = ['light', 'dark']
+VALID_COLOR_THEMES = ['purple', 'blue', 'green', 'orange', 'gold', 'red', 'yellow', 'matrix', 'bee']
+VALID_HOME_PAGES = ['helm', 'codex', 'beacon', 'ledger', 'brainhair']
 
-    Returns:
-        dict: {'theme': 'light'|'dark', 'color_theme': 'purple'|'blue'|'green'|'orange'|'gold'}
-    """
-    user_email = token_data.get('email')
-    current_app.logger.debug(f"get_user_theme called for email: {user_email}")
 
-    default_prefs = {'theme': 'light', 'color_theme': 'purple'}
+# Preference cache: cached_{theme,color_theme,home_page} plus per-preference
+# _time/_ttl/_etag fields. Stored in Redis under prefs:<email> when REDIS_URI is
+# set (shared by every worker, keeps the session cookie small), otherwise as
+# one dict in session['prefs_cache'].
+
+# How long Redis keeps a user's entry after the last write. Longer than the
+# freshness TTL so stale values and their ETags remain for conditional refreshes.
+PREFERENCE_CACHE_RETAIN = 3600
+
+_MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+
+def _read_preference_cache(user_email):
+    """Return the cached preference fields for this user as a dict (empty on miss)."""
+    r = get_redis()
+    if r is None:
+        return session.get('prefs_cache') or {}
+    try:
+        cached = r.hgetall(f'prefs:{user_email}')
+    except Exception as e:
+        current_app.logger.warning("Failed to read preference cache from Redis: %s", e)
+        return {}
+    return {key.decode(): value.decode() for key, value in cached.items()}
+
+
+def _write_preference_cache(user_email, fields):
+    """Store preference fields for this user."""
+    r = get_redis()
+    if r is None:
+        # Reassign (rather than mutate) so the session is marked modified
+        session['prefs_cache'] = {**(session.get('prefs_cache') or {}), **fields}
+        return
+    try:
+        key = f'prefs:{user_email}'
+        pipe = r.pipeline()
+        pipe.hset(key, mapping=fields)
+        pipe.expire(key, PREFERENCE_CACHE_RETAIN)
+        pipe.execute()
+    except Exception as e:
+        current_app.logger.warning("Failed to write preference cache to Redis: %s", e)
 
-    if not user_email:
-        current_app.logger.debug("No email in token, defaulting to light theme")
-        return default_prefs
 
-    # Check session cache first
-    cached_theme = session.get('cached_theme')
-    cached_color_theme = session.get('cached_color_theme')
-    cache_time = session.get('cached_theme_time', 0)
+def _is_fresh(prefs, name):
+    """Whether the cached <name> preference is younger than its TTL."""
+    cache_time = float(prefs.get(f'cached_{name}_time', 0))
+    ttl = float(prefs.get(f'cached_{name}_ttl', PREFERENCE_CACHE_TTL))
+    return (time.time() - cache_time) < ttl
 
-    if cached_theme and cached_color_theme and (time.time() - cache_time) < PREFERENCE_CACHE_TTL:
-        current_app.logger.debug(f"Using cached themes: {cached_theme}, {cached_color_theme}")
+
+def _cached_theme(prefs, allow_stale=False):
+    """Return the cached theme prefs if still fresh (or at all, with allow_stale), otherwise None."""
+    cached_theme = prefs.get('cached_theme')
+    cached_color_theme = prefs.get('cached_color_theme')
+
+    if cached_theme and cached_color_theme and (allow_stale or _is_fresh(prefs, 'theme')):
         return {'theme': cached_theme, 'color_theme': cached_color_theme}
+    return None
+
 
+def _cached_home_page(prefs, allow_stale=False):
+    """Return the cached home page if still fresh (or at all, with allow_stale), otherwise None."""
+    cached_home = prefs.get('cached_home_page')
+
+    if cached_home and (allow_stale or _is_fresh(prefs, 'home_page')):
+        return cached_home
+    return None
+
+
+def _cache_ttl(response):
+    """Freshness lifetime from Codex's Cache-Control max-age, else PREFERENCE_CACHE_TTL."""
+    match = _MAX_AGE_RE.search(response.headers.get('Cache-Control', ''))
+    return int(match.group(1)) if match else PREFERENCE_CACHE_TTL
+
+
+def _fetch_theme(user_email, stale=None, etag=None):
+    """
+    Fetch and validate theme prefs from Codex.
+
+    With an ETag from a previous fetch the request is conditional, and a 304
+    returns the stale value unchanged.
+
+    Returns:
+        tuple: (theme dict or None on any failure, ETag, TTL seconds)
+    """
     try:
         # Call Codex API using proper service-to-service authentication
         response = call_service(
             'codex',
             '/api/public/user/theme',
             params={'email': user_email},
+            headers={'If-None-Match': etag} if etag and stale else {},
             timeout=2  # Quick timeout to avoid slowing down page loads
         )
 
-        current_app.logger.debug(f"Codex theme API response: {response.status_code}")
+        current_app.logger.debug("Codex theme API response: %s", response.status_code)
+
+        if response.status_code == 304 and stale:
+            return stale, etag, _cache_ttl(response)
 
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             theme = data.get('theme', 'light')
             color_theme = data.get('color_theme', 'purple')
-            current_app.logger.debug(f"Themes from Codex: {theme}, {color_theme}")
+            current_app.logger.debug("Themes from Codex: %s, %s", theme, color_theme)
 
             # Validate theme values
-            if theme in ['light', 'dark'] and color_theme in ['purple', 'blue', 'green', 'orange', 'gold', 'red', 'yellow', 'matrix', 'bee']:
-                # Cache in session
-                session['cached_theme'] = theme
-                session['cached_color_theme'] = color_theme
-                session['cached_theme_time'] = time.time()
-                return {'theme': theme, 'color_theme': color_theme}
+            if theme in VALID_THEMES and color_theme in VALID_COLOR_THEMES:
+                return ({'theme': theme, 'color_theme': color_theme},
+                        response.headers.get('ETag', ''), _cache_ttl(response))
 
     except Exception as e:
         # Log error but don't fail the page load
-        current_app.logger.warning(f"Failed to fetch user theme from Codex: {e}")
+        current_app.logger.warning("Failed to fetch user theme from Codex: %s", e)
 
-    # Default to light theme if anything goes wrong
-    current_app.logger.debug("Defaulting to default themes")
-    return default_prefs
+    return None, '', 0
 
 
-def get_user_home_page(token_data):
+def _fetch_home_page(user_email, stale=None, etag=None):
     """
-    Fetch user's home page preference from Codex with session caching.
-    Falls back to 'helm' if Codex is unavailable or user not found.
+    Fetch and validate the home page preference from Codex.
 
-    Args:
-        token_data: Decoded JWT token containing user info
+    Conditional on etag like _fetch_theme.
 
     Returns:
-        str: Service slug (e.g., 'helm', 'codex', 'beacon', 'ledger', 'brainhair')
+        tuple: (home page slug or None on any failure, ETag, TTL seconds)
     """
-    user_email = token_data.get('email')
-    current_app.logger.debug(f"get_user_home_page called for email: {user_email}")
-
-    if not user_email:
-        current_app.logger.debug("No email in token, defaulting to helm")
-        return 'helm'  # Default if no email in token
-
-    # Check session cache first
-    cached_home = session.get('cached_home_page')
-    cache_time = session.get('cached_home_page_time', 0)
-
-    if cached_home and (time.time() - cache_time) < PREFERENCE_CACHE_TTL:
-        current_app.logger.debug(f"Using cached home page: {cached_home}")
-        return cached_home
-
     try:
         # Call Codex API using proper service-to-service authentication
         response = call_service(
             'codex',
             '/api/public/user/home-page',
             params={'email': user_email},
+            headers={'If-None-Match': etag} if etag and stale else {},
             timeout=2  # Quick timeout to avoid slowing down redirects
         )
 
-        current_app.logger.debug(f"Codex home page API response: {response.status_code}")
+        current_app.logger.debug("Codex home page API response: %s", response.status_code)
+
+        if response.status_code == 304 and stale:
+            return stale, etag, _cache_ttl(response)
 
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             home_page = data.get('home_page', 'helm')
-            current_app.logger.debug(f"Home page from Codex: {home_page}")
+            current_app.logger.debug("Home page from Codex: %s", home_page)
 
             # Validate home page value
-            valid_pages = ['helm', 'codex', 'beacon', 'ledger', 'brainhair']
-            if home_page in valid_pages:
-                # Cache in session
-                session['cached_home_page'] = home_page
-                session['cached_home_page_time'] = time.time()
-                return home_page
+            if home_page in VALID_HOME_PAGES:
+                return home_page, response.headers.get('ETag', ''), _cache_ttl(response)
 
     except Exception as e:
         # Log error but don't fail the redirect
-        current_app.logger.warning(f"Failed to fetch user home page from Codex: {e}")
+        current_app.logger.warning("Failed to fetch user home page from Codex: %s", e)
 
-    # Default to helm if anything goes wrong
-    current_app.logger.debug("Defaulting to helm")
-    return 'helm'
+    return None, '', 0
+
+
+def _in_request_context(func):
+    """Wrap func to run on another thread with this request's context and correlation ID."""
+    correlation_id = g.get('correlation_id')
+
+    @copy_current_request_context
+    def wrapper(*args, **kwargs):
+        if correlation_id:
+            g.correlation_id = correlation_id
+        return func(*args, **kwargs)
+
+    return wrapper
 
 
-def invalidate_preference_cache():
+def _load_preferences(user_email, prefs, want_theme, want_home_page):
     """
-    Clear cached user preferences. Call this when user updates their settings.
+    Fetch the requested preferences from Codex and cache them.
+
+    When both are stale the two Codex calls run concurrently, so the request
+    that first misses (usually the / redirect) pays one round-trip and the
+    page load right after it finds the theme already cached. Stale cached
+    values are revalidated with If-None-Match.
+
+    Returns:
+        tuple: (theme dict or None, home page slug or None)
     """
-    session.pop('cached_theme', None)
-    session.pop('cached_color_theme', None)
-    session.pop('cached_theme_time', None)
-    session.pop('cached_home_page', None)
-    session.pop('cached_home_page_time', None)
+    theme_args = (user_email, _cached_theme(prefs, allow_stale=True), prefs.get('cached_theme_etag'))
+    home_args = (user_email, _cached_home_page(prefs, allow_stale=True), prefs.get('cached_home_page_etag'))
+
+    theme = home_page = None
+    if want_theme and want_home_page:
+        home_future = _preference_executor.submit(_in_request_context(_fetch_home_page), *home_args)
+        theme, theme_etag, theme_ttl = _fetch_theme(*theme_args)
+        home_page, home_etag, home_ttl = home_future.result()
+    elif want_theme:
+        theme, theme_etag, theme_ttl = _fetch_theme(*theme_args)
+    elif want_home_page:
+        home_page, home_etag, home_ttl = _fetch_home_page(*home_args)
+
+    # Cache the results (only from the request thread)
+    now = time.time()
+    fields = {}
+    if theme:
+        fields['cached_theme'] = theme['theme']
+        fields['cached_color_theme'] = theme['color_theme']
+        fields['cached_theme_time'] = now
+        fields['cached_theme_ttl'] = theme_ttl
+        fields['cached_theme_etag'] = theme_etag
+    if home_page:
+        fields['cached_home_page'] = home_page
+        fields['cached_home_page_time'] = now
+        fields['cached_home_page_ttl'] = home_ttl
+        fields['cached_home_page_etag'] = home_etag
+    if fields:
+        _write_preference_cache(user_email, fields)
+
+    return theme, home_page
 
 
-@app.route('/api/invalidate-cache', methods=['POST'])
-def invalidate_cache_endpoint():
+def get_user_theme(token_data):
     """
-    Endpoint to invalidate user preference cache.
-    Called by the theme toggle after saving to Codex.
+    Fetch user's theme preferences from Codex with session caching.
+    Falls back to defaults if Codex is unavailable or user not found.
+
+    Args:
+        token_data: Decoded JWT token containing user info
+
+    Returns:
+        dict: {'theme': 'light'|'dark', 'color_theme': 'purple'|'blue'|'green'|'orange'|'gold'}
     """
-    invalidate_preference_cache()
-    return jsonify({'success': True, 'message': 'Cache invalidated'})
+    user_email = token_data.get('email')
+    current_app.logger.debug("get_user_theme called for email: %s", user_email)
 
+    default_prefs = {'theme': 'light', 'color_theme': 'purple'}
 
-def inject_side_panel(soup, current_service, user_data=None):
-    """Injects the side panel navigation into the HTML."""
-    services = current_app.config.get('SERVICES', {})
-    user_permission = user_data.get('permission_level', 'client') if user_data else 'client'
+    if not user_email:
+        current_app.logger.debug("No email in token, defaulting to light theme")
+        return default_prefs
 
-    # Create side panel HTML
-    side_panel_html = '''
-    <div class="hivematrix-side-panel" id="side-panel">
-        <div class="side-panel__header">
-            <button class="side-panel__toggle" id="sidebar-toggle" aria-label="Toggle sidebar">
-                <svg viewBox="0 0 24 24"><line x1="3" y1="12" x2="21" y2="12"/><line x1="3" y1="6" x2="21" y2="6"/><line x1="3" y1="18" x2="21" y2="18"/></svg>
-            </button>
-            <h3 class="side-panel__title">HiveMatrix</h3>
-        </div>
-        <nav class="side-panel__nav">
-            <ul class="side-panel__list">
-    '''
+    # Check cache first
+    prefs = _read_preference_cache(user_email)
+    cached = _cached_theme(prefs)
+    if cached:
+        current_app.logger.debug("Using cached themes: %s, %s", cached['theme'], cached['color_theme'])
+        return cached
 
-    # Service icons mapping - Lucide icons to match Helm dashboard
-    service_icons = {
-        'template': '<svg viewBox="0 0 24 24"><path d="M14 2H6a2 2 0 0 0-2 2v16a2 2 0 0 0 2 2h12a2 2 0 0 0 2-2V8z"/><polyline points="14 2 14 8 20 8"/><line x1="16" y1="13" x2="8" y2="13"/><line x1="16" y1="17" x2="8" y2="17"/><polyline points="10 9 9 9 8 9"/></svg>',
-        'codex': '<svg viewBox="0 0 24 24"><ellipse cx="12" cy="5" rx="9" ry="3"/><path d="M21 12c0 1.66-4 3-9 3s-9-1.34-9-3"/><path d="M3 5v14c0 1.66 4 3 9 3s9-1.34 9-3V5"/></svg>',
-        'knowledgetree': '<svg viewBox="0 0 24 24"><path d="M10 10v.2A3 3 0 0 1 8.9 16v0H5v0h0a3 3 0 0 1-1-5.8V10a3 3 0 0 1 6 0Z"/><path d="M7 16v6"/><path d="M13 19v3"/><path d="M12 19h8.3a1 1 0 0 0 .7-1.7L18 14h.3a1 1 0 0 0 .7-1.7L16 9h.2a1 1 0 0 0 .8-1.7L13 3l-1.1 1.7"/></svg>',
-        'ledger': '<svg viewBox="0 0 24 24"><path d="M4 2v20l2-1 2 1 2-1 2 1 2-1 2 1 2-1 2 1V2l-2 1-2-1-2 1-2-1-2 1-2-1-2 1-2-1Z"/><path d="M16 8h-6a2 2 0 1 0 0 4h4a2 2 0 1 1 0 4H8"/><path d="M12 17V7"/></svg>',
-        'resolve': '<svg viewBox="0 0 24 24"><polyline points="9 11 12 14 22 4"/><path d="M21 12v7a2 2 0 0 1-2 2H5a2 2 0 0 1-2-2V5a2 2 0 0 1 2-2h11"/></svg>',
-        'architect': '<svg viewBox="0 0 24 24"><rect x="3" y="3" width="7" height="7"/><rect x="14" y="3" width="7" height="7"/><rect x="14" y="14" width="7" height="7"/><rect x="3" y="14" width="7" height="7"/></svg>',
-        'treasury': '<svg viewBox="0 0 24 24"><rect x="1" y="4" width="22" height="16" rx="2" ry="2"/><line x1="1" y1="10" x2="23" y2="10"/></svg>',
-        'core': '<svg viewBox="0 0 24 24"><path d="M12 22s8-4 8-10V5l-8-3-8 3v7c0 6 8 10 8 10z"/></svg>',
-        'nexus': '<svg viewBox="0 0 24 24"><circle cx="12" cy="12" r="3"/><circle cx="19" cy="5" r="2"/><circle cx="5" cy="19" r="2"/><path d="M10.4 21.9a10 10 0 0 0 9.941-15.416"/><path d="M13.5 2.1a10 10 0 0 0-9.841 15.416"/></svg>',
-        'helm': '<svg viewBox="0 0 24 24"><path d="M12 6v16"/><path d="m19 13 2-1a9 9 0 0 1-18 0l2 1"/><path d="M9 11h6"/><circle cx="12" cy="4" r="2"/></svg>',
-        'brainhair': '<svg viewBox="0 0 24 24"><path d="M12 5a3 3 0 1 0-5.997.125 4 4 0 0 0-2.526 5.77 4 4 0 0 0 .556 6.588A4 4 0 1 0 12 18Z"/><path d="M12 5a3 3 0 1 1 5.997.125 4 4 0 0 1 2.526 5.77 4 4 0 0 1-.556 6.588A4 4 0 1 1 12 18Z"/><path d="M15 13a4.5 4.5 0 0 1-3-4 4.5 4.5 0 0 1-3 4"/><path d="M17.599 6.5a3 3 0 0 0 .399-1.375"/><path d="M6.003 5.125A3 3 0 0 0 6.401 6.5"/><path d="M3.477 10.896a4 4 0 0 1 .585-.396"/><path d="M19.938 10.5a4 4 0 0 1 .585.396"/><path d="M6 18a4 4 0 0 1-1.967-.516"/><path d="M19.967 17.484A4 4 0 0 1 18 18"/></svg>',
-        'beacon': '<svg viewBox="0 0 24 24"><path d="M4.9 16.1C1 12.2 1 5.8 4.9 1.9"/><path d="M7.8 4.7a6.14 6.14 0 0 0-.8 7.5"/><circle cx="12" cy="9" r="2"/><path d="M16.2 4.8c2 2 2.26 5.11.8 7.47"/><path d="M19.1 1.9a9.96 9.96 0 0 1 0 14.1"/><path d="M9.5 18h5"/><path d="m8 22 4-11 4 11"/></svg>',
-        'archive': '<svg viewBox="0 0 24 24"><rect width="18" height="18" x="3" y="3" rx="2"/><circle cx="7.5" cy="7.5" r=".5" fill="currentColor"/><path d="m7.9 7.9 2.7 2.7"/><circle cx="16.5" cy="7.5" r=".5" fill="currentColor"/><path d="m13.4 10.6 2.7-2.7"/><circle cx="7.5" cy="16.5" r=".5" fill="currentColor"/><path d="m7.9 16.1 2.7-2.7"/><circle cx="16.5" cy="16.5" r=".5" fill="currentColor"/><path d="m13.4 13.4 2.7 2.7"/><circle cx="12" cy="12" r="2"/></svg>'
-    }
+    # Refresh the home page alongside if it has gone stale too
+    theme, _ = _load_preferences(user_email, prefs, True, _cached_home_page(prefs) is None)
+    if theme:
+        return theme
 
-    # Add each service as a link (only if visible and user has permission)
-    for service_name, service_config in services.items():
-        # Skip services that are not visible
-        if not service_config.get('visible', True):
-            continue
+    # Default to light theme if anything goes wrong
+    current_app.logger.debug("Defaulting to default themes")
+    return default_prefs
 
-        # Skip admin-only services if user is not admin
-        if service_config.get('admin_only', False) and user_permission != 'admin':
-            continue
 
-        # Skip billing/admin-only services if user is not admin or billing
-        if service_config.get('billing_or_admin_only', False) and user_permission not in ['admin', 'billing']:
-            continue
+def get_user_home_page(token_data):
+    """
+    Fetch user's home page preference from Codex with session caching.
+    Falls back to 'helm' if Codex is unavailable or user not found.
 
-        icon = service_icons.get(service_name, '📦')
-        active_class = 'side-panel__item--active' if service_name == current_service else ''
-        display_name = service_name.title()
+    Args:
+        token_data: Decoded JWT token containing user info
 
-        side_panel_html += f'''
-            <li class="side-panel__item {active_class}">
-                <a href="/{service_name}/" class="side-panel__link">
-                    <span class="side-panel__icon">{icon}</span>
-                    <span class="side-panel__label">{display_name}</span>
-                </a>
-            </li>
-        '''
+    Returns:
+        str: Service slug (e.g., 'helm', 'codex', 'beacon', 'ledger', 'brainhair')
+    """
+    user_email = token_data.get('email')
+    current_app.logger.debug("get_user_home_page called for email: %s", user_email)
 
-    side_panel_html += '''
-            </ul>
-        </nav>
-        <div class="side-panel__footer">
-            <a href="/codex/settings" class="side-panel__link">
-                <span class="side-panel__icon"><svg viewBox="0 0 24 24"><circle cx="12" cy="12" r="3"/><path d="M19.4 15a1.65 1.65 0 0 0 .33 1.82l.06.06a2 2 0 0 1 0 2.83 2 2 0 0 1-2.83 0l-.06-.06a1.65 1.65 0 0 0-1.82-.33 1.65 1.65 0 0 0-1 1.51V21a2 2 0 0 1-2 2 2 2 0 0 1-2-2v-.09A1.65 1.65 0 0 0 9 19.4a1.65 1.65 0 0 0-1.82.33l-.06.06a2 2 0 0 1-2.83 0 2 2 0 0 1 0-2.83l.06-.06a1.65 1.65 0 0 0 .33-1.82 1.65 1.65 0 0 0-1.51-1H3a2 2 0 0 1-2-2 2 2 0 0 1 2-2h.09A1.65 1.65 0 0 0 4.6 9a1.65 1.65 0 0 0-.33-1.82l-.06-.06a2 2 0 0 1 0-2.83 2 2 0 0 1 2.83 0l.06.06a1.65 1.65 0 0 0 1.82.33H9a1.65 1.65 0 0 0 1-1.51V3a2 2 0 0 1 2-2 2 2 0 0 1 2 2v.09a1.65 1.65 0 0 0 1 1.51 1.65 1.65 0 0 0 1.82-.33l.06-.06a2 2 0 0 1 2.83 0 2 2 0 0 1 0 2.83l-.06.06a1.65 1.65 0 0 0-.33 1.82V9a1.65 1.65 0 0 0 1.51 1H21a2 2 0 0 1 2 2 2 2 0 0 1-2 2h-.09a1.65 1.65 0 0 0-1.51 1z"/></svg></span>
-                <span class="side-panel__label">Settings</span>
-            </a>
-            <a href="/logout" class="side-panel__link">
-                <span class="side-panel__icon"><svg viewBox="0 0 24 24"><path d="M9 21H5a2 2 0 0 1-2-2V5a2 2 0 0 1 2-2h4"/><polyline points="16 17 21 12 16 7"/><line x1="21" y1="12" x2="9" y2="12"/></svg></span>
-                <span class="side-panel__label">Logout</span>
-            </a>
-            <button class="theme-toggle" id="theme-toggle-btn" aria-label="Toggle theme">
-                <span class="theme-toggle__track">
-                    <span class="theme-toggle__thumb">
-                        <svg viewBox="0 0 24 24" class="theme-icon-moon"><path d="M21 12.79A9 9 0 1 1 11.21 3 7 7 0 0 0 21 12.79z"/></svg>
-                        <svg viewBox="0 0 24 24" class="theme-icon-sun"><circle cx="12" cy="12" r="5"/><line x1="12" y1="1" x2="12" y2="3"/><line x1="12" y1="21" x2="12" y2="23"/><line x1="4.22" y1="4.22" x2="5.64" y2="5.64"/><line x1="18.36" y1="18.36" x2="19.78" y2="19.78"/><line x1="1" y1="12" x2="3" y2="12"/><line x1="21" y1="12" x2="23" y2="12"/><line x1="4.22" y1="19.78" x2="5.64" y2="18.36"/><line x1="18.36" y1="5.64" x2="19.78" y2="4.22"/></svg>
-                    </span>
-                </span>
-            </button>
-        </div>
-    </div>
-    '''
+    if not user_email:
+        current_app.logger.debug("No email in token, defaulting to helm")
+        return 'helm'  # Default if no email in token
 
-    # Add wrapper div for layout
-    wrapper_start = '<div class="hivematrix-layout">'
-    wrapper_end = '</div>'
+    # Check cache first
+    prefs = _read_preference_cache(user_email)
+    cached_home = _cached_home_page(prefs)
+    if cached_home:
+        current_app.logger.debug("Using cached home page: %s", cached_home)
+        return cached_home
 
-    # Find body tag and inject
-    body = soup.find('body')
-    if body:
-        # Wrap existing content
-        body_contents = ''.join(str(tag) for tag in body.contents)
-        body.clear()
+    # Prefetch the theme as well; the redirect that follows renders a page
+    _, home_page = _load_preferences(user_email, prefs, _cached_theme(prefs) is None, True)
+    if home_page:
+        return home_page
 
-        # Create new structure with proper nesting
-        layout_wrapper = BeautifulSoup(f'''
-        <div class="hivematrix-layout">
-            {side_panel_html}
-            <div class="hivematrix-content">
-                {body_contents}
-            </div>
-        </div>
-        ''', 'html.parser')
+    # Default to helm if anything goes wrong
+    current_app.logger.debug("Defaulting to helm")
+    return 'helm'
+
+
+# Codex endpoint for the user's own settings; writes through main_gateway clear the cache
+_CODEX_SETTINGS_PATH = 'api/my/settings'
 
-        body.append(layout_wrapper)
 
-        # Inject theme toggle script at end of body (separate from HTML to avoid BeautifulSoup mangling)
-        theme_script = soup.new_tag('script')
-        theme_script.string = '''
+def invalidate_preference_cache(user_email=None):
+    """
+    Clear cached user preferences. Call this when user updates their settings.
+
+    Args:
+        user_email: Whose cache to clear (defaults to the logged-in user)
+    """
+    if user_email is None:
+        user_email = (session.get('user') or {}).get('email')
+
+    r = get_redis()
+    if r is not None and user_email:
+        try:
+            r.delete(f'prefs:{user_email}')
+        except Exception as e:
+            current_app.logger.warning("Failed to clear preference cache in Redis: %s", e)
+
+    session.pop('prefs_cache', None)
+
+
+@app.route('/api/invalidate-cache', methods=['POST'])
+def invalidate_cache_endpoint():
+    """
+    Endpoint to invalidate user preference cache.
+    For settings changes that don't go through main_gateway's Codex proxy.
+    """
+    invalidate_preference_cache()
+    return jsonify({'success': True, 'message': 'Cache invalidated'})
+
+
+# Theme toggle + sidebar script appended to every proxied page (static, built once)
+_THEME_SCRIPT_HTML = '''<script>
 console.log('[Theme Toggle] Script loaded');
 
 // Theme toggle functionality
@@ -407,17 +641,7 @@ async function toggleTheme() {
         } else {
             const result = await response.json();
             console.log('Theme saved successfully:', newTheme);
-
-            // Invalidate Nexus cache so next page load uses new theme
-            try {
-                await fetch('/api/invalidate-cache', {
-                    method: 'POST',
-                    credentials: 'same-origin'
-                });
-                console.log('Nexus cache invalidated');
-            } catch (cacheError) {
-                console.warn('Failed to invalidate cache:', cacheError);
-            }
+            // Nexus drops its cached preferences when the save passes through it
         }
     } catch (error) {
         console.error('Error saving theme:', error);
@@ -482,8 +706,262 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 });
-'''
-        body.append(theme_script)
+</script>'''
+
+# Opening <html> tag of a full (non-fragment) proxied page, and the theme
+# attributes Nexus sets on it (any value a backend already rendered is dropped).
+# Page bodies are matched and spliced as bytes, never decoded.
+_HTML_OPEN_RE = re.compile(rb'<html(?=[\s>])[^>]*>', re.IGNORECASE)
+_THEME_ATTR_RE = re.compile(rb'\s+data-(?:color-)?theme(?![\w-])(?:\s*=\s*(?:"[^"]*"|\'[^\']*\'|[^\s>]+))?', re.IGNORECASE)
+_HEAD_CLOSE_RE = re.compile(rb'</head\s*>', re.IGNORECASE)
+
+# Runs immediately before render to set the collapsed sidebar state, preventing a flash
+_SIDEBAR_INIT_SCRIPT_HTML = '''<script>
+(function() {
+    if (localStorage.getItem('sidebar-collapsed') === 'true') {
+        document.documentElement.classList.add('sidebar-collapsed');
+    }
+})();
+</script>'''
+
+
+@lru_cache(maxsize=8)
+def _head_injection_html(static_url):
+    """
+    Markup appended to a proxied page's <head>: Nexus's CSS and Easter egg
+    scripts (versioned for caching) and the inline sidebar script. Cached per
+    static URL prefix.
+    """
+    return ''.join((
+        f'<link rel="stylesheet" href="{static_url}/css/global.css?v={VERSION}">',
+        f'<link rel="stylesheet" href="{static_url}/css/side-panel.css?v={VERSION}">',
+        _SIDEBAR_INIT_SCRIPT_HTML,
+        f'<script defer src="{static_url}/js/matrix-rain.js?v={VERSION}"></script>',
+        f'<script defer src="{static_url}/js/bee-flight.js?v={VERSION}"></script>'
+    )).encode()
+
+
+def _is_script_request():
+    """
+    True if the current request was made by page JavaScript (XHR, fetch, htmx)
+    rather than by the browser navigating, so its HTML needs no side panel.
+
+    htmx-boosted links are navigations whose <body> replaces the page's, so
+    they still get the full treatment.
+    """
+    headers = request.headers
+    if 'HX-Boosted' in headers:
+        return False
+    return (
+        'HX-Request' in headers or
+        headers.get('X-Requested-With') == 'XMLHttpRequest' or
+        headers.get('Sec-Fetch-Dest') == 'empty'
+    )
+
+# Opening/closing <body> tags of a proxied page (any case, any attributes)
+_BODY_OPEN_RE = re.compile(rb'<body\b[^>]*>', re.IGNORECASE)
+_BODY_CLOSE_RE = re.compile(rb'</body\s*>', re.IGNORECASE)
+
+# (name, visible, admin_only, billing_or_admin_only) for each configured service;
+# services.json is only read at startup, so this is the side panel's cache key
+SIDE_PANEL_SERVICES = tuple(
+    (name, config.get('visible', True), config.get('admin_only', False), config.get('billing_or_admin_only', False))
+    for name, config in SERVICES.items()
+)
+
+
+# Side panel markup before the service links
+_SIDE_PANEL_HEADER = '''
+    <div class="hivematrix-side-panel" id="side-panel">
+        <div class="side-panel__header">
+            <button class="side-panel__toggle" id="sidebar-toggle" aria-label="Toggle sidebar">
+                <svg viewBox="0 0 24 24"><line x1="3" y1="12" x2="21" y2="12"/><line x1="3" y1="6" x2="21" y2="6"/><line x1="3" y1="18" x2="21" y2="18"/></svg>
+            </button>
+            <h3 class="side-panel__title">HiveMatrix</h3>
+        </div>
+        <nav class="side-panel__nav">
+            <ul class="side-panel__list">
+    '''
+
+# Service icons mapping - Lucide icons to match Helm dashboard
+_SERVICE_ICONS = {
+    'template': '<svg viewBox="0 0 24 24"><path d="M14 2H6a2 2 0 0 0-2 2v16a2 2 0 0 0 2 2h12a2 2 0 0 0 2-2V8z"/><polyline points="14 2 14 8 20 8"/><line x1="16" y1="13" x2="8" y2="13"/><line x1="16" y1="17" x2="8" y2="17"/><polyline points="10 9 9 9 8 9"/></svg>',
+    'codex': '<svg viewBox="0 0 24 24"><ellipse cx="12" cy="5" rx="9" ry="3"/><path d="M21 12c0 1.66-4 3-9 3s-9-1.34-9-3"/><path d="M3 5v14c0 1.66 4 3 9 3s9-1.34 9-3V5"/></svg>',
+    'knowledgetree': '<svg viewBox="0 0 24 24"><path d="M10 10v.2A3 3 0 0 1 8.9 16v0H5v0h0a3 3 0 0 1-1-5.8V10a3 3 0 0 1 6 0Z"/><path d="M7 16v6"/><path d="M13 19v3"/><path d="M12 19h8.3a1 1 0 0 0 .7-1.7L18 14h.3a1 1 0 0 0 .7-1.7L16 9h.2a1 1 0 0 0 .8-1.7L13 3l-1.1 1.7"/></svg>',
+    'ledger': '<svg viewBox="0 0 24 24"><path d="M4 2v20l2-1 2 1 2-1 2 1 2-1 2 1 2-1 2 1V2l-2 1-2-1-2 1-2-1-2 1-2-1-2 1-2-1Z"/><path d="M16 8h-6a2 2 0 1 0 0 4h4a2 2 0 1 1 0 4H8"/><path d="M12 17V7"/></svg>',
+    'resolve': '<svg viewBox="0 0 24 24"><polyline points="9 11 12 14 22 4"/><path d="M21 12v7a2 2 0 0 1-2 2H5a2 2 0 0 1-2-2V5a2 2 0 0 1 2-2h11"/></svg>',
+    'architect': '<svg viewBox="0 0 24 24"><rect x="3" y="3" width="7" height="7"/><rect x="14" y="3" width="7" height="7"/><rect x="14" y="14" width="7" height="7"/><rect x="3" y="14" width="7" height="7"/></svg>',
+    'treasury': '<svg viewBox="0 0 24 24"><rect x="1" y="4" width="22" height="16" rx="2" ry="2"/><line x1="1" y1="10" x2="23" y2="10"/></svg>',
+    'core': '<svg viewBox="0 0 24 24"><path d="M12 22s8-4 8-10V5l-8-3-8 3v7c0 6 8 10 8 10z"/></svg>',
+    'nexus': '<svg viewBox="0 0 24 24"><circle cx="12" cy="12" r="3"/><circle cx="19" cy="5" r="2"/><circle cx="5" cy="19" r="2"/><path d="M10.4 21.9a10 10 0 0 0 9.941-15.416"/><path d="M13.5 2.1a10 10 0 0 0-9.841 15.416"/></svg>',
+    'helm': '<svg viewBox="0 0 24 24"><path d="M12 6v16"/><path d="m19 13 2-1a9 9 0 0 1-18 0l2 1"/><path d="M9 11h6"/><circle cx="12" cy="4" r="2"/></svg>',
+    'brainhair': '<svg viewBox="0 0 24 24"><path d="M12 5a3 3 0 1 0-5.997.125 4 4 0 0 0-2.526 5.77 4 4 0 0 0 .556 6.588A4 4 0 1 0 12 18Z"/><path d="M12 5a3 3 0 1 1 5.997.125 4 4 0 0 1 2.526 5.77 4 4 0 0 1-.556 6.588A4 4 0 1 1 12 18Z"/><path d="M15 13a4.5 4.5 0 0 1-3-4 4.5 4.5 0 0 1-3 4"/><path d="M17.599 6.5a3 3 0 0 0 .399-1.375"/><path d="M6.003 5.125A3 3 0 0 0 6.401 6.5"/><path d="M3.477 10.896a4 4 0 0 1 .585-.396"/><path d="M19.938 10.5a4 4 0 0 1 .585.396"/><path d="M6 18a4 4 0 0 1-1.967-.516"/><path d="M19.967 17.484A4 4 0 0 1 18 18"/></svg>',
+    'beacon': '<svg viewBox="0 0 24 24"><path d="M4.9 16.1C1 12.2 1 5.8 4.9 1.9"/><path d="M7.8 4.7a6.14 6.14 0 0 0-.8 7.5"/><circle cx="12" cy="9" r="2"/><path d="M16.2 4.8c2 2 2.26 5.11.8 7.47"/><path d="M19.1 1.9a9.96 9.96 0 0 1 0 14.1"/><path d="M9.5 18h5"/><path d="m8 22 4-11 4 11"/></svg>',
+    'archive': '<svg viewBox="0 0 24 24"><rect width="18" height="18" x="3" y="3" rx="2"/><circle cx="7.5" cy="7.5" r=".5" fill="currentColor"/><path d="m7.9 7.9 2.7 2.7"/><circle cx="16.5" cy="7.5" r=".5" fill="currentColor"/><path d="m13.4 10.6 2.7-2.7"/><circle cx="7.5" cy="16.5" r=".5" fill="currentColor"/><path d="m7.9 16.1 2.7-2.7"/><circle cx="16.5" cy="16.5" r=".5" fill="currentColor"/><path d="m13.4 13.4 2.7 2.7"/><circle cx="12" cy="12" r="2"/></svg>'
+}
+
+# One side panel link, formatted per visible service
+_SIDE_PANEL_ITEM = '''
+            <li class="side-panel__item {active_class}">
+                <a href="/{service_name}/" class="side-panel__link">
+                    <span class="side-panel__icon">{icon}</span>
+                    <span class="side-panel__label">{display_name}</span>
+                </a>
+            </li>
+        '''
+
+# Side panel markup after the service links (settings, logout, theme toggle)
+_SIDE_PANEL_FOOTER = '''
+            </ul>
+        </nav>
+        <div class="side-panel__footer">
+            <a href="/codex/settings" class="side-panel__link">
+                <span class="side-panel__icon"><svg viewBox="0 0 24 24"><circle cx="12" cy="12" r="3"/><path d="M19.4 15a1.65 1.65 0 0 0 .33 1.82l.06.06a2 2 0 0 1 0 2.83 2 2 0 0 1-2.83 0l-.06-.06a1.65 1.65 0 0 0-1.82-.33 1.65 1.65 0 0 0-1 1.51V21a2 2 0 0 1-2 2 2 2 0 0 1-2-2v-.09A1.65 1.65 0 0 0 9 19.4a1.65 1.65 0 0 0-1.82.33l-.06.06a2 2 0 0 1-2.83 0 2 2 0 0 1 0-2.83l.06-.06a1.65 1.65 0 0 0 .33-1.82 1.65 1.65 0 0 0-1.51-1H3a2 2 0 0 1-2-2 2 2 0 0 1 2-2h.09A1.65 1.65 0 0 0 4.6 9a1.65 1.65 0 0 0-.33-1.82l-.06-.06a2 2 0 0 1 0-2.83 2 2 0 0 1 2.83 0l.06.06a1.65 1.65 0 0 0 1.82.33H9a1.65 1.65 0 0 0 1-1.51V3a2 2 0 0 1 2-2 2 2 0 0 1 2 2v.09a1.65 1.65 0 0 0 1 1.51 1.65 1.65 0 0 0 1.82-.33l.06-.06a2 2 0 0 1 2.83 0 2 2 0 0 1 0 2.83l-.06.06a1.65 1.65 0 0 0-.33 1.82V9a1.65 1.65 0 0 0 1.51 1H21a2 2 0 0 1 2 2 2 2 0 0 1-2 2h-.09a1.65 1.65 0 0 0-1.51 1z"/></svg></span>
+                <span class="side-panel__label">Settings</span>
+            </a>
+            <a href="/logout" class="side-panel__link">
+                <span class="side-panel__icon"><svg viewBox="0 0 24 24"><path d="M9 21H5a2 2 0 0 1-2-2V5a2 2 0 0 1 2-2h4"/><polyline points="16 17 21 12 16 7"/><line x1="21" y1="12" x2="9" y2="12"/></svg></span>
+                <span class="side-panel__label">Logout</span>
+            </a>
+            <button class="theme-toggle" id="theme-toggle-btn" aria-label="Toggle theme">
+                <span class="theme-toggle__track">
+                    <span class="theme-toggle__thumb">
+                        <svg viewBox="0 0 24 24" class="theme-icon-moon"><path d="M21 12.79A9 9 0 1 1 11.21 3 7 7 0 0 0 21 12.79z"/></svg>
+                        <svg viewBox="0 0 24 24" class="theme-icon-sun"><circle cx="12" cy="12" r="5"/><line x1="12" y1="1" x2="12" y2="3"/><line x1="12" y1="21" x2="12" y2="23"/><line x1="4.22" y1="4.22" x2="5.64" y2="5.64"/><line x1="18.36" y1="18.36" x2="19.78" y2="19.78"/><line x1="1" y1="12" x2="3" y2="12"/><line x1="21" y1="12" x2="23" y2="12"/><line x1="4.22" y1="19.78" x2="5.64" y2="18.36"/><line x1="18.36" y1="5.64" x2="19.78" y2="4.22"/></svg>
+                    </span>
+                </span>
+            </button>
+        </div>
+    </div>
+    '''
+
+
+def _can_see_service(user_permission, visible, admin_only, billing_or_admin_only):
+    """Whether a service gets a side panel link for this permission level."""
+    # Skip services that are not visible
+    if not visible:
+        return False
+
+    # Skip admin-only services if user is not admin
+    if admin_only and user_permission != 'admin':
+        return False
+
+    # Skip billing/admin-only services if user is not admin or billing
+    if billing_or_admin_only and user_permission not in ['admin', 'billing']:
+        return False
+
+    return True
+
+
+@lru_cache(maxsize=16)
+def _home_page_targets(user_permission):
+    """
+    Return (services this permission level may use as its home page, the
+    first-accessible service to fall back to or None).
+
+    services.json is only read at startup, so this is worked out once per
+    permission level. The fallback only skips hidden and admin-only services.
+    """
+    allowed = frozenset(
+        name for name, visible, admin_only, billing_or_admin_only in SIDE_PANEL_SERVICES
+        if _can_see_service(user_permission, visible, admin_only, billing_or_admin_only)
+    )
+    fallback = next(
+        (name for name, visible, admin_only, _ in SIDE_PANEL_SERVICES
+         if visible and not (admin_only and user_permission != 'admin')),
+        None
+    )
+    return allowed, fallback
+
+
+@lru_cache(maxsize=64)
+def _render_side_panel(user_permission, current_service, services_key):
+    """
+    Build the bytes spliced after <body> (layout wrapper, side panel, content div).
+
+    The output only depends on the arguments, so each permission level /
+    current service pair is rendered once per worker.
+    """
+    # Add each service as a link (only if visible and user has permission)
+    items = ''.join(
+        _SIDE_PANEL_ITEM.format(
+            active_class='side-panel__item--active' if service_name == current_service else '',
+            service_name=service_name,
+            icon=_SERVICE_ICONS.get(service_name, '📦'),
+            display_name=service_name.title()
+        )
+        for service_name, *visibility in services_key
+        if _can_see_service(user_permission, *visibility)
+    )
+
+    # Add wrapper div for layout; the page's own body contents follow
+    return f'''
+        <div class="hivematrix-layout">
+            {_SIDE_PANEL_HEADER}{items}{_SIDE_PANEL_FOOTER}
+            <div class="hivematrix-content">
+                '''.encode()
+
+
+# Closes the content/layout divs opened by _render_side_panel, then the theme script
+_SIDE_PANEL_CLOSE_HTML = '''
+            </div>
+        </div>
+        '''.encode() + _THEME_SCRIPT_HTML.encode()
+
+
+def inject_side_panel(html, current_service, user_data=None):
+    """
+    Injects the side panel navigation into the HTML (page bytes in, bytes out).
+
+    The cached panel markup is spliced in right after the opening <body> tag
+    and the closing divs + theme script right before the last </body>, so the
+    page's own markup passes through untouched. Pages without a <body> tag are
+    returned unchanged.
+    """
+    body_open = _BODY_OPEN_RE.search(html)
+    if not body_open:
+        return html
+
+    user_permission = user_data.get('permission_level', 'client') if user_data else 'client'
+    panel_html = _render_side_panel(user_permission, current_service, SIDE_PANEL_SERVICES)
+
+    body_start = body_open.end()
+    body_end = None
+    for body_close in _BODY_CLOSE_RE.finditer(html, body_start):
+        body_end = body_close.start()
+    if body_end is None:
+        body_end = len(html)
+
+    return b''.join((
+        html[:body_start],
+        panel_html,
+        html[body_start:body_end],
+        _SIDE_PANEL_CLOSE_HTML,
+        html[body_end:]
+    ))
+
+# Health checker with dependencies, built once rather than per probe
+health_checker = HealthChecker(
+    service_name='nexus',
+    dependencies=[
+        ('core', 'http://localhost:5000'),
+        ('keycloak', app.config.get('KEYCLOAK_SERVER_URL', 'http://localhost:8080'))
+    ],
+    # The whole /health response is cached below; a second cache of the
+    # individual checks would only make the reported statuses staler
+    cache_ttl=0
+)
+
+# Probes arrive every few seconds, and each full check stats the disk and
+# calls Core and Keycloak, so a result (timestamp included) is reused for
+# HEALTH_CACHE_TTL seconds: (checked_at, JSON body, status)
+HEALTH_CACHE_TTL = 5
+_health_result = (0.0, b'', 503)
+# Held while refreshing, so probes arriving then wait for that check instead
+# of each running their own
+_health_lock = threading.Lock()
+_HEALTH_HEADERS = {'Content-Type': 'application/json', 'Cache-Control': 'no-store'}
+
 
 @app.route('/health')
 @limiter.exempt
@@ -499,16 +977,16 @@ def health():
     Returns:
         JSON: Detailed health status with HTTP 200 (healthy) or 503 (unhealthy/degraded)
     """
-    # Initialize health checker with dependencies
-    health_checker = HealthChecker(
-        service_name='nexus',
-        dependencies=[
-            ('core', 'http://localhost:5000'),
-            ('keycloak', current_app.config.get('KEYCLOAK_SERVER_URL', 'http://localhost:8080'))
-        ]
-    )
-
-    return health_checker.get_health()
+    global _health_result
+    checked_at, body, status = _health_result
+    if time.time() - checked_at >= HEALTH_CACHE_TTL:
+        with _health_lock:
+            checked_at, body, status = _health_result
+            if time.time() - checked_at >= HEALTH_CACHE_TTL:
+                response, status = health_checker.get_health()
+                body = response.get_data()
+                _health_result = (time.time(), body, status)
+    return Response(body, status, _HEALTH_HEADERS)
 
 
 @app.route('/helpdesk')
@@ -525,6 +1003,36 @@ def professional_services_redirect():
     return redirect('/beacon/professional-services')
 
 
+# Hop-by-hop headers (RFC 7230 section 6.1) describe one connection, never the
+# message, so they are dropped in both directions. The client's Connection would
+# close pooled sockets, and its Transfer-Encoding no longer matches the body.
+_HOP_BY_HOP_HEADERS = ('connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+                       'proxy-connection', 'te', 'trailer', 'transfer-encoding', 'upgrade')
+
+# Request headers never forwarded upstream. Werkzeug yields request header
+# names title-cased from the WSGI environ, so an exact match is enough.
+_UNFORWARDED_REQUEST_HEADERS = frozenset(('Host',) + tuple(name.title() for name in _HOP_BY_HOP_HEADERS))
+
+# Upstream response headers dropped before replying (the body is re-framed)
+_EXCLUDED_RESPONSE_HEADERS = frozenset(('content-encoding', 'content-length') + _HOP_BY_HOP_HEADERS)
+
+# Keycloak static theme paths (login page CSS/JS/images), streamed without rewriting
+_KEYCLOAK_STATIC_PREFIXES = ('resources/', 'js/', 'css/', 'img/', 'fonts/')
+
+# Statuses whose Location header keycloak_proxy points back at itself
+_REDIRECT_STATUSES = frozenset((301, 302, 303, 307, 308))
+
+
+def _stream_upstream(raw, chunk_size=64 * 1024):
+    """Yield a streamed urllib3 response body, releasing the connection when done."""
+    try:
+        for chunk in raw.stream(chunk_size, decode_content=True):
+            if chunk:
+                yield chunk
+    finally:
+        raw.release_conn()
+
+
 @app.route('/keycloak/', defaults={'path': ''})
 @app.route('/keycloak/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE'])
 def keycloak_proxy(path):
@@ -534,12 +1042,12 @@ def keycloak_proxy(path):
     """
     # Use backend URL for proxy connection (always localhost:8080)
     # KEYCLOAK_SERVER_URL is the frontend URL that clients use
-    keycloak_backend = os.environ.get('KEYCLOAK_BACKEND_URL', 'http://localhost:8080')
+    keycloak_backend = KEYCLOAK_BACKEND_URL
     keycloak_url = keycloak_backend
     backend_url = f"{keycloak_backend}/{path}"
 
     # Forward the request to Keycloak with proxy headers
-    headers = {key: value for (key, value) in request.headers if key.lower() != 'host'}
+    headers = {key: value for (key, value) in request.headers if key not in _UNFORWARDED_REQUEST_HEADERS}
 
     # Add X-Forwarded headers for Keycloak proxy detection
     headers['X-Forwarded-For'] = request.remote_addr
@@ -549,7 +1057,7 @@ def keycloak_proxy(path):
     headers['X-Forwarded-Prefix'] = '/keycloak'
 
     try:
-        resp = requests.request(
+        resp = keycloak_session.request(
             method=request.method,
             url=backend_url,
             headers=headers,
@@ -557,56 +1065,61 @@ def keycloak_proxy(path):
             params=request.args,
             cookies=request.cookies,
             allow_redirects=False,
-            timeout=30
+            stream=True,  # Only pages that need URL rewriting are read into memory
+            timeout=(3, 30)  # Fail fast if Keycloak is down rather than holding the worker
         )
 
+        # Theme assets carry no cookies or Keycloak URLs: skip the rewriting entirely
+        if path.startswith(_KEYCLOAK_STATIC_PREFIXES):
+            response_headers = [(name, value) for (name, value) in resp.raw.headers.items()
+                                if name.lower() not in _EXCLUDED_RESPONSE_HEADERS]
+            return Response(_stream_upstream(resp.raw), resp.status_code, response_headers)
+
         # Build response
-        excluded_headers = ['content-encoding', 'content-length', 'transfer-encoding', 'connection']
         response_headers = []
+        proxy_url = request.host_url.rstrip('/') + '/keycloak'
+        is_redirect = resp.status_code in _REDIRECT_STATUSES
 
+        # One pass over the upstream headers, rewriting cookies and redirects inline
         for name, value in resp.raw.headers.items():
-            if name.lower() in excluded_headers:
+            lower_name = name.lower()
+            if lower_name in _EXCLUDED_RESPONSE_HEADERS:
                 continue
 
             # Rewrite Set-Cookie headers to use the proxy path
-            if name.lower() == 'set-cookie':
+            if lower_name == 'set-cookie':
                 # Remove domain restrictions and set path to /keycloak
-                value = re.sub(r'; Domain=[^;]+', '', value)
-                value = re.sub(r'; Path=[^;]+', '; Path=/keycloak', value)
+                value = _COOKIE_SCOPE_RE.sub(_rescope_keycloak_cookie, value)
                 # Ensure SameSite=None for cross-origin cookies if using HTTPS
                 if 'SameSite' not in value:
                     value += '; SameSite=Lax'
 
-            response_headers.append((name, value))
-
-        content = resp.content
+            # Rewrite Location headers to go through Nexus proxy
+            elif lower_name == 'location' and is_redirect and value.startswith(keycloak_url):
+                value = value.replace(keycloak_url, proxy_url)
 
-        # Rewrite Location headers to go through Nexus proxy
-        if resp.status_code in [301, 302, 303, 307, 308]:
-            location = resp.headers.get('Location', '')
-            if location.startswith(keycloak_url):
-                # Rewrite to go through Nexus proxy
-                new_location = location.replace(keycloak_url, request.host_url.rstrip('/') + '/keycloak')
-                response_headers = [(name, new_location if name.lower() == 'location' else value)
-                                  for (name, value) in response_headers]
+            response_headers.append((name, value))
 
         # Rewrite HTML/JS/CSS content to replace Keycloak URLs
         content_type = resp.headers.get('Content-Type', '')
         if 'text/html' in content_type or 'application/javascript' in content_type or 'text/css' in content_type:
-            try:
-                text = content.decode('utf-8')
-                # Replace absolute URLs to Keycloak with proxied URLs
-                text = text.replace(keycloak_url, request.host_url.rstrip('/') + '/keycloak')
-                # Replace relative references that might bypass the proxy
-                text = re.sub(r'action="/', f'action="{request.host_url.rstrip("/")}/keycloak/', text)
-                content = text.encode('utf-8')
-            except (UnicodeDecodeError, UnicodeEncodeError) as e:
-                current_app.logger.debug(f"Could not rewrite Keycloak response content: {e}")
-
-        return Response(content, resp.status_code, response_headers)
+            # The URLs are ASCII, so rewrite the bytes directly rather than decoding the page
+            proxy_prefix = proxy_url.encode()
+            keycloak_url_bytes = keycloak_url.encode()
+            content = resp.content
+            # Replace absolute URLs to Keycloak with proxied URLs
+            if keycloak_url_bytes in content:
+                content = content.replace(keycloak_url_bytes, proxy_prefix)
+            # Replace relative references that might bypass the proxy
+            if b'action="/' in content:
+                content = content.replace(b'action="/', b'action="' + proxy_prefix + b'/')
+            return Response(content, resp.status_code, response_headers)
+
+        # Everything else (images, fonts, redirects...) is passed through as it arrives
+        return Response(_stream_upstream(resp.raw), resp.status_code, response_headers)
 
     except requests.exceptions.RequestException as e:
-        current_app.logger.error(f"Keycloak proxy error: {e}")
+        current_app.logger.error("Keycloak proxy error: %s", e)
         return "Authentication service temporarily unavailable", 502
 
 
@@ -633,8 +1146,8 @@ def login_proxy():
 
     # Build Keycloak authorization URL using Nexus's proxy
     # This ensures external browsers can reach Keycloak through Nexus
-    keycloak_realm = os.environ.get('KEYCLOAK_REALM', 'hivematrix')
-    client_id = os.environ.get('KEYCLOAK_CLIENT_ID', 'core-client')
+    keycloak_realm = KEYCLOAK_REALM
+    client_id = KEYCLOAK_CLIENT_ID
 
     # Nexus's callback URL (external-facing)
     redirect_uri = url_for('keycloak_callback', _external=True)
@@ -685,16 +1198,20 @@ def keycloak_callback():
 
     # Exchange code for tokens with Keycloak
     # Use backend URL for server-to-server communication (avoids SSL issues)
-    keycloak_backend = os.environ.get('KEYCLOAK_BACKEND_URL', 'http://localhost:8080')
-    keycloak_realm = os.environ.get('KEYCLOAK_REALM', 'hivematrix')
-    client_id = os.environ.get('KEYCLOAK_CLIENT_ID', 'core-client')
-    client_secret = os.environ.get('KEYCLOAK_CLIENT_SECRET')
+    keycloak_backend = KEYCLOAK_BACKEND_URL
+    keycloak_realm = KEYCLOAK_REALM
+    client_id = KEYCLOAK_CLIENT_ID
+    client_secret = KEYCLOAK_CLIENT_SECRET
     redirect_uri = url_for('keycloak_callback', _external=True)
 
     token_url = f"{keycloak_backend}/realms/{keycloak_realm}/protocol/openid-connect/token"
 
+    # Load Core's signing keys while Keycloak and Core are busy, so the
+    # validate_token() below doesn't add a third round trip on a cold worker
+    _validation_executor.submit(get_jwks_client().get_jwk_set)
+
     try:
-        token_response = requests.post(
+        token_response = keycloak_session.post(
             token_url,
             data={
                 'grant_type': 'authorization_code',
@@ -702,30 +1219,38 @@ def keycloak_callback():
                 'redirect_uri': redirect_uri,
                 'client_id': client_id,
                 'client_secret': client_secret
-            }
+            },
+            timeout=(2, 5)
         )
 
         if token_response.status_code != 200:
-            current_app.logger.error(f"Failed to exchange code for token: {token_response.text}")
+            current_app.logger.error("Failed to exchange code for token: %s", token_response.text)
             return "Authentication failed - please try again", 502
 
-        token_data = token_response.json()
+        token_data = orjson.loads(token_response.content)
         access_token = token_data.get('access_token')
 
         # Now request JWT from Core by sending the access token
         core_url = current_app.config['CORE_SERVICE_URL']
-        jwt_response = requests.post(
+        jwt_response = core_session.post(
             f"{core_url}/api/token/exchange",
-            headers={'Authorization': f'Bearer {access_token}'},
-            json={'access_token': access_token}
+            headers={'Authorization': f'Bearer {access_token}', 'Content-Type': 'application/json'},
+            data=orjson.dumps({'access_token': access_token}),
+            timeout=(2, 5)
         )
 
         if jwt_response.status_code == 200:
-            jwt_token = jwt_response.json().get('token')
+            jwt_token = orjson.loads(jwt_response.content).get('token')
             if jwt_token:
                 # Validate and store the token
                 user_data = validate_token(jwt_token)
                 if user_data:
+                    # Server-side sessions get a new id at login, so an id
+                    # planted in the browser beforehand never gains the token.
+                    # Cookie sessions have no id to fix.
+                    regenerate = getattr(session, 'regenerate', None)
+                    if regenerate is not None:
+                        regenerate()
                     session['token'] = jwt_token
                     session['user'] = user_data
                     session.pop('oauth_state', None)
@@ -733,43 +1258,18 @@ def keycloak_callback():
                     # Redirect to original destination
                     return redirect(session.pop('next_url', '/'))
 
-        current_app.logger.error(f"Failed to get JWT from Core: {jwt_response.status_code}")
+        current_app.logger.error("Failed to get JWT from Core: %s", jwt_response.status_code)
         return "Authentication failed - please try again", 502
 
-    except requests.exceptions.RequestException as e:
-        current_app.logger.error(f"Authentication flow error: {e}")
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+        current_app.logger.error("Authentication flow error: %s", e)
         return "Authentication service temporarily unavailable", 502
 
 
 
 
-@app.route('/logout')
-def logout():
-    """
-    Logout: revokes token at Core, clears session, and redirects to login.
-    """
-    # Get the token before clearing session
-    token = session.get('token')
-
-    # Revoke the token at Core if present
-    if token:
-        try:
-            core_url = current_app.config['CORE_SERVICE_URL']
-            revoke_response = requests.post(
-                f"{core_url}/api/token/revoke",
-                json={'token': token},
-                timeout=5
-            )
-            if revoke_response.status_code != 200:
-                current_app.logger.warning(f"Token revocation failed: {revoke_response.status_code}")
-        except Exception as e:
-            current_app.logger.warning(f"Error revoking token: {e}")
-
-    # Clear the Nexus session
-    session.clear()
-
-    # Return HTML that clears storage and redirects
-    html = """
+# Logged-out page: clears browser storage and cookies, then redirects to login
+_LOGOUT_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -819,23 +1319,169 @@ def logout():
         </script>
     </body>
     </html>
+    """.encode()
+
+# Prevent caching of the logged-out page and have the browser wipe site data
+_LOGOUT_HEADERS = {
+    'Cache-Control': 'no-cache, no-store, must-revalidate, max-age=0, private',
+    'Pragma': 'no-cache',
+    'Expires': '0',
+    'Clear-Site-Data': '"cache", "cookies", "storage"'
+}
+
+
+@app.route('/logout')
+def logout():
+    """
+    Logout: revokes token at Core, clears session, and redirects to login.
     """
+    # Get the token before clearing session
+    token = session.get('token')
+
+    # Revoke the token at Core if present
+    if token:
+        # Stop this worker accepting it from the validation cache straight away
+        _validated_tokens.pop(_token_cache_key(token), None)
+        try:
+            core_url = current_app.config['CORE_SERVICE_URL']
+            revoke_response = core_session.post(
+                f"{core_url}/api/token/revoke",
+                data=orjson.dumps({'token': token}),
+                headers=_JSON_HEADERS,
+                timeout=5
+            )
+            if revoke_response.status_code != 200:
+                current_app.logger.warning("Token revocation failed: %s", revoke_response.status_code)
+        except Exception as e:
+            current_app.logger.warning("Error revoking token: %s", e)
 
-    response = make_response(html)
+    # Clear the Nexus session
+    session.clear()
+
+    # Return HTML that clears storage and redirects
+    response = Response(_LOGOUT_HTML, mimetype='text/html', headers=_LOGOUT_HEADERS)
 
     # Delete session cookie server-side
     response.set_cookie('session', '', expires=0, path='/', max_age=0,
                        samesite='Lax', secure=True, httponly=True)
 
-    # Prevent caching
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate, max-age=0, private'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
-    response.headers['Clear-Site-Data'] = '"cache", "cookies", "storage"'
-
     return response
 
 
+def _decorate_page(html, service_name, token_data):
+    """Apply the user's theme, Nexus's head markup and the side panel to a proxied HTML page (bytes)."""
+    # Empty bodies (204, HEAD-like replies) have nothing to inject into
+    if not html:
+        return html
+
+    # Add data-theme and data-color-theme attributes to html tag
+    # Fetch user's theme preferences from Codex (fragments have no <html>)
+    html_open = _HTML_OPEN_RE.search(html)
+    if html_open:
+        theme_prefs = get_user_theme(token_data)
+        tag = _THEME_ATTR_RE.sub(b'', html_open.group(0)[:-1])
+        html = b''.join((
+            html[:html_open.start()],
+            tag,
+            f' data-theme="{theme_prefs["theme"]}" data-color-theme="{theme_prefs["color_theme"]}">'.encode(),
+            html[html_open.end():]
+        ))
+
+    # Inject Nexus CSS and scripts at the end of <head>
+    head_close = _HEAD_CLOSE_RE.search(html)
+    if head_close:
+        head_html = _head_injection_html(request.script_root + app.static_url_path)
+        html = html[:head_close.start()] + head_html + html[head_close.start():]
+
+    return inject_side_panel(html, service_name, token_data)
+
+
+# Proxied HTML pages of services with "cache_ttl" (seconds) in services.json:
+#   {(user sub, service name, full path): (fetched_at, status, headers, raw body)}
+# Bodies are stored as the backend sent them, so the theme and side panel are
+# applied per hit. While a backend is unreachable, entries up to
+# PAGE_CACHE_STALE_MAX seconds old are served instead of a 502.
+#
+# The entries live in each worker. Any non-GET request to the service marks the
+# user's pages fetched before it as stale: with Redis the time of that write is
+# kept under PAGE_CACHE_WRITE_PREFIX<sub>:<service>, so every worker (and Nexus
+# instance) stops serving them. Without Redis only the worker that proxied the
+# write forgets them and the others keep serving them for up to cache_ttl, so
+# cache_ttl is then only safe on read-only services.
+PAGE_CACHE_MAX = 128
+PAGE_CACHE_MAX_BYTES = 512 * 1024
+PAGE_CACHE_STALE_MAX = 600
+PAGE_CACHE_WRITE_PREFIX = 'pagecache:written:'
+_page_cache = {}
+_page_cache_lock = threading.Lock()  # Guards eviction and invalidation sweeps
+
+if get_redis() is None and any(config.get('cache_ttl') for config in SERVICES.values()):
+    app.logger.warning("cache_ttl is set without REDIS_URI: cached pages are only invalidated "
+                       "in the worker that proxied the user's change")
+
+def _is_cacheable_page(resp, content):
+    """Only plain successful pages that set no cookies and allow storing are cached."""
+    return (
+        resp.status == 200 and
+        len(content) <= PAGE_CACHE_MAX_BYTES and
+        'Set-Cookie' not in resp.headers and
+        'no-store' not in resp.headers.get('Cache-Control', '')
+    )
+
+def _cache_page(key, fetched_at, status, headers, content):
+    with _page_cache_lock:
+        if len(_page_cache) >= PAGE_CACHE_MAX:
+            _page_cache.pop(next(iter(_page_cache)), None)  # Oldest first
+        _page_cache[key] = (fetched_at, status, headers, content)
+
+def _drop_cached_pages(sub, service_name):
+    """Forget a user's cached pages for a service (after they change something there)."""
+    with _page_cache_lock:
+        for key in [key for key in list(_page_cache) if key[0] == sub and key[1] == service_name]:
+            _page_cache.pop(key, None)
+
+    redis_client = get_redis()
+    if redis_client is not None:
+        try:
+            redis_client.set(f"{PAGE_CACHE_WRITE_PREFIX}{sub}:{service_name}", time.time(),
+                             ex=PAGE_CACHE_STALE_MAX)
+        except Exception as e:
+            current_app.logger.warning("Failed to record page cache invalidation in Redis: %s", e)
+
+def _cached_page_current(entry, sub, service_name):
+    """False if the user changed something in the service, in any worker, after the page was fetched."""
+    redis_client = get_redis()
+    if redis_client is None:
+        return True
+    try:
+        written_at = redis_client.get(f"{PAGE_CACHE_WRITE_PREFIX}{sub}:{service_name}")
+    except Exception as e:
+        # Can't tell whether another worker saw a write, so don't trust the entry
+        current_app.logger.warning("Failed to read page cache invalidation from Redis: %s", e)
+        return False
+    return written_at is None or entry[0] > float(written_at)
+
+def _cached_page_response(entry, service_name, token_data, state):
+    _, status, headers, content = entry
+    return Response(_decorate_page(content, service_name, token_data), status, headers + [('X-Cache', state)])
+
+
+# Home page for a user whose permission level can't reach any service
+_NO_SERVICES_HTML = b"<h1>HiveMatrix Nexus</h1><p>No services available for your permission level.</p>"
+
+
+def _login_redirect():
+    """Redirect to Nexus's /login, remembering the requested page (built without url_for)."""
+    return redirect(f"{request.script_root}/login?{urlencode({'next': request.full_path}, safe='/')}")
+
+
+def _request_body():
+    """The client's request body, or None without reading the input when it sent none (plain GETs)."""
+    if request.content_length or 'Transfer-Encoding' in request.headers:
+        return request.get_data()
+    return None
+
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE'])
 def main_gateway(path):
@@ -846,10 +1492,9 @@ def main_gateway(path):
     # Proxy Keycloak paths directly without authentication
     # These are needed for the login flow to work
     if path.startswith('realms/') or path.startswith('resources/'):
-        keycloak_url = os.environ.get('KEYCLOAK_SERVER_URL', 'http://localhost:8080')
-        backend_url = f"{keycloak_url}/{path}"
+        backend_url = f"{KEYCLOAK_SERVER_URL}/{path}"
 
-        headers = {key: value for (key, value) in request.headers if key.lower() != 'host'}
+        headers = {key: value for (key, value) in request.headers if key not in _UNFORWARDED_REQUEST_HEADERS}
         headers['X-Forwarded-For'] = request.remote_addr
         headers['X-Forwarded-Proto'] = 'https' if request.is_secure else 'http'
         headers['X-Forwarded-Host'] = request.host
@@ -857,7 +1502,7 @@ def main_gateway(path):
         headers['X-Forwarded-Prefix'] = '/keycloak'
 
         try:
-            resp = requests.request(
+            resp = keycloak_session.request(
                 method=request.method,
                 url=backend_url,
                 headers=headers,
@@ -868,13 +1513,12 @@ def main_gateway(path):
                 timeout=30
             )
 
-            excluded_headers = ['content-encoding', 'content-length', 'transfer-encoding', 'connection']
             response_headers = [(name, value) for (name, value) in resp.raw.headers.items()
-                              if name.lower() not in excluded_headers]
+                              if name.lower() not in _EXCLUDED_RESPONSE_HEADERS]
 
             return Response(resp.content, resp.status_code, response_headers)
         except requests.exceptions.RequestException as e:
-            current_app.logger.error(f"Keycloak proxy error: {e}")
+            current_app.logger.error("Keycloak proxy error: %s", e)
             return "Authentication service temporarily unavailable", 502
 
     # Allow unauthenticated access to Beacon public display routes (for TV displays)
@@ -892,7 +1536,7 @@ def main_gateway(path):
     if not skip_authentication:
         if 'token' not in session:
             # No token at all - redirect to Nexus's login (which proxies to Core/Keycloak)
-            return redirect(url_for('login_proxy', next=request.full_path))
+            return _login_redirect()
 
         # --- Validate the token ---
         token = session['token']
@@ -901,7 +1545,7 @@ def main_gateway(path):
         if not token_data:
             # Token is expired or invalid - clear session and redirect to login
             session.clear()
-            return redirect(url_for('login_proxy', next=request.full_path))
+            return _login_redirect()
 
         # Update session with fresh token data (in case it was decoded again)
         session['user'] = token_data
@@ -911,61 +1555,54 @@ def main_gateway(path):
 
     # If the path is empty, redirect to the user's preferred home page
     if not path:
-        services = current_app.config.get('SERVICES', {})
         user_permission = token_data.get('permission_level', 'client')
 
         # Get user's preferred home page from Codex
         preferred_home = get_user_home_page(token_data)
 
         # Check if user has access to their preferred home page
-        if preferred_home in services:
-            service_config = services[preferred_home]
-            # Check if user has permission
-            if service_config.get('admin_only', False) and user_permission != 'admin':
-                preferred_home = None  # Fall back to first accessible
-            elif service_config.get('billing_or_admin_only', False) and user_permission not in ['admin', 'billing']:
-                preferred_home = None  # Fall back to first accessible
-            elif not service_config.get('visible', True):
-                preferred_home = None  # Fall back to first accessible
-        else:
-            preferred_home = None  # Invalid service, fall back
-
-        # If preferred home is valid and accessible, use it
-        if preferred_home:
+        allowed_homes, first_accessible = _home_page_targets(user_permission)
+        if preferred_home in allowed_homes:
             return redirect(f'/{preferred_home}/')
 
         # Fall back to first accessible service
-        first_accessible = None
-        for service_name, service_config in services.items():
-            # Skip if not visible
-            if not service_config.get('visible', True):
-                continue
-            # Skip if admin_only and user is not admin
-            if service_config.get('admin_only', False) and user_permission != 'admin':
-                continue
-            first_accessible = service_name
-            break
-
         if first_accessible:
             return redirect(f'/{first_accessible}/')
         else:
-            return "<h1>HiveMatrix Nexus</h1><p>No services available for your permission level.</p>", 200
+            return Response(_NO_SERVICES_HTML, mimetype='text/html')
 
     # Determine service from the first part of the path
     path_parts = path.split('/')
     service_name = path_parts[0]
     service_path = '/'.join(path_parts[1:])
 
-    services = current_app.config.get('SERVICES', {})
-    service_config = services.get(service_name)
+    service_config = SERVICES.get(service_name)
 
     if not service_config:
         return f"Service '{service_name}' not found.", 404
 
     backend_url = f"{service_config['url']}/{service_path}"
+    if request.query_string:
+        backend_url = f"{backend_url}?{request.query_string.decode('latin-1')}"
+
+    # Opt-in page cache; any other request to the service clears the user's
+    # pages once the backend has handled it
+    page_key = cached_page = None
+    drops_cached_pages = False
+    if service_config.get('cache_ttl'):
+        if request.method == 'GET':
+            if not _is_script_request():
+                page_key = (token_data.get('sub'), service_name, request.full_path)
+                cached_page = _page_cache.get(page_key)
+                if cached_page and not _cached_page_current(cached_page, token_data.get('sub'), service_name):
+                    cached_page = None
+                if cached_page and time.time() - cached_page[0] < service_config['cache_ttl']:
+                    return _cached_page_response(cached_page, service_name, token_data, 'HIT')
+        else:
+            drops_cached_pages = True
 
     # --- Add Auth Header and X-Forwarded Headers to Proxied Request ---
-    headers = {key: value for (key, value) in request.headers if key != 'Host'}
+    headers = {key: value for (key, value) in request.headers if key not in _UNFORWARDED_REQUEST_HEADERS}
 
     # Only add Authorization header if user is authenticated (not a public route)
     if not skip_authentication:
@@ -978,270 +1615,61 @@ def main_gateway(path):
     headers['X-Forwarded-Prefix'] = f'/{service_name}'
 
     try:
-        # Always enable streaming so we can detect SSE responses
-        resp = requests.request(
-            method=request.method,
-            url=backend_url,
-            headers=headers,
-            params=request.args,  # Forward query string parameters
-            data=request.get_data(),
-            cookies=request.cookies,
-            allow_redirects=False,
-            stream=True,  # Always stream so we can check content-type
-            timeout=30)  # Prevent hanging requests
+        # Pages count as fetched when the request is sent, so one that races a
+        # write is never newer than it
+        fetched_at = time.time()
+        # Straight to urllib3: the browser's Cookie header and query string are
+        # forwarded as-is. Never preloaded, so we can detect SSE responses.
+        try:
+            resp = service_pool.request(
+                request.method,
+                backend_url,
+                body=_request_body(),
+                headers=headers,
+                retries=CONNECT_RETRY,
+                redirect=False,
+                preload_content=False,
+                timeout=30)  # Prevent hanging requests
+        finally:
+            # Once the backend has handled (or may have handled) the change;
+            # a page fetched while it was in flight is then stale too
+            if drops_cached_pages:
+                _drop_cached_pages(token_data.get('sub'), service_name)
+
+        response_headers = [(name, value) for (name, value) in resp.headers.items() if name.lower() not in _EXCLUDED_RESPONSE_HEADERS]
+
+        # A settings change saved through Codex makes the cached theme/home page stale
+        if (service_name == 'codex' and request.method != 'GET'
+                and service_path.startswith(_CODEX_SETTINGS_PATH) and resp.status < 400):
+            invalidate_preference_cache(token_data.get('email'))
 
-        excluded_headers = ['content-encoding', 'content-length', 'transfer-encoding', 'connection']
-        response_headers = [(name, value) for (name, value) in resp.raw.headers.items() if name.lower() not in excluded_headers]
+        content_type = resp.headers.get('Content-Type', '')
 
         # If streaming response (SSE), stream it back immediately without buffering
-        if 'text/event-stream' in resp.headers.get('Content-Type', ''):
-            def generate():
-                for chunk in resp.iter_content(chunk_size=1024, decode_unicode=False):
-                    if chunk:
-                        yield chunk
-            return Response(generate(), resp.status_code, response_headers)
-
-        # Otherwise, read all content for HTML injection or normal responses
-        # When using stream=True, we must consume the entire response
-        content = b''.join(resp.iter_content(chunk_size=8192))
-
-        if 'text/html' in resp.headers.get('Content-Type', ''):
-            soup = BeautifulSoup(content, 'html.parser')
-
-            # Add data-theme and data-color-theme attributes to html tag
-            # Fetch user's theme preferences from Codex
-            html_tag = soup.find('html')
-            if html_tag:
-                theme_prefs = get_user_theme(token_data)
-                html_tag['data-theme'] = theme_prefs['theme']
-                html_tag['data-color-theme'] = theme_prefs['color_theme']
-
-            head = soup.find('head')
-            if head:
-                # Inject global CSS with cache-busting
-                from app.version import VERSION
-                css_link = soup.new_tag('link', rel='stylesheet', href=f"{url_for('static', filename='css/global.css')}?v={VERSION}")
-                head.append(css_link)
-
-                # Inject side panel CSS with cache-busting
-                panel_css_link = soup.new_tag('link', rel='stylesheet', href=f"{url_for('static', filename='css/side-panel.css')}?v={VERSION}")
-                head.append(panel_css_link)
-
-                # Inject inline script to prevent sidebar flash on page load
-                # This runs immediately before render to set collapsed state
-                sidebar_init_script = soup.new_tag('script')
-                sidebar_init_script.string = '''
-                    (function() {
-                        if (localStorage.getItem('sidebar-collapsed') === 'true') {
-                            document.documentElement.classList.add('sidebar-collapsed');
-                        }
-                    })();
-                '''
-                head.append(sidebar_init_script)
-
-                # Inject Matrix rain Easter egg animation
-                matrix_rain_script = soup.new_tag('script')
-                matrix_rain_script.string = '''
-                    document.addEventListener('DOMContentLoaded', function() {
-                        // Create canvas for Matrix rain
-                        const canvas = document.createElement('canvas');
-                        canvas.id = 'matrix-rain';
-                        document.body.insertBefore(canvas, document.body.firstChild);
-
-                        const ctx = canvas.getContext('2d');
-
-                        // Matrix characters - Katakana + Latin + numbers
-                        const chars = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789@#$%^&*()ｱｲｳｴｵｶｷｸｹｺｻｼｽｾｿﾀﾁﾂﾃﾄﾅﾆﾇﾈﾉﾊﾋﾌﾍﾎﾏﾐﾑﾒﾓﾔﾕﾖﾗﾘﾙﾚﾛﾜﾝ';
-                        const fontSize = 14;
-                        let columns = 0;
-                        let drops = [];
-
-                        // Set canvas size and recalculate columns/drops
-                        function resizeCanvas() {
-                            canvas.width = window.innerWidth;
-                            canvas.height = window.innerHeight;
-
-                            // Recalculate columns for new width
-                            const newColumns = Math.floor(canvas.width / fontSize);
-
-                            // Only reset drops if column count changed
-                            if (newColumns !== columns) {
-                                columns = newColumns;
-                                drops = Array(columns).fill(1).map(() => Math.floor(Math.random() * canvas.height / fontSize));
-                            }
-                        }
-                        resizeCanvas();
-                        window.addEventListener('resize', resizeCanvas);
-
-                        // Frame counter for slower animation
-                        let frameCount = 0;
-                        const frameSkip = 2; // Draw every 3rd frame (slower animation)
-
-                        function drawMatrixRain() {
-                            // Check if Matrix theme is active
-                            const isMatrixTheme = document.documentElement.getAttribute('data-color-theme') === 'matrix';
-                            if (!isMatrixTheme) {
-                                ctx.clearRect(0, 0, canvas.width, canvas.height);
-                                requestAnimationFrame(drawMatrixRain);
-                                return;
-                            }
-
-                            // Only update every frameSkip frames for slower animation
-                            frameCount++;
-                            if (frameCount % (frameSkip + 1) !== 0) {
-                                requestAnimationFrame(drawMatrixRain);
-                                return;
-                            }
-
-                            // Semi-transparent black to create fade effect
-                            ctx.fillStyle = 'rgba(0, 0, 0, 0.05)';
-                            ctx.fillRect(0, 0, canvas.width, canvas.height);
-
-                            // Matrix green text
-                            ctx.fillStyle = '#00ff41';
-                            ctx.font = fontSize + 'px monospace';
-
-                            for (let i = 0; i < drops.length; i++) {
-                                const char = chars[Math.floor(Math.random() * chars.length)];
-                                const x = i * fontSize;
-                                const y = drops[i] * fontSize;
-
-                                ctx.fillText(char, x, y);
-
-                                // Reset drop to top randomly after it falls off screen
-                                if (y > canvas.height && Math.random() > 0.975) {
-                                    drops[i] = 0;
-                                }
-
-                                drops[i]++;
-                            }
-
-                            requestAnimationFrame(drawMatrixRain);
-                        }
-
-                        // Start animation
-                        drawMatrixRain();
-                    });
-                '''
-                head.append(matrix_rain_script)
-
-                # Inject Bee Easter egg animation
-                bee_flight_script = soup.new_tag('script')
-                bee_flight_script.string = '''
-                    document.addEventListener('DOMContentLoaded', function() {
-                        // Create bee container
-                        const beeContainer = document.createElement('div');
-                        beeContainer.id = 'bee-container';
-                        document.body.insertBefore(beeContainer, document.body.firstChild);
-
-                        let activeBees = 0;
-                        const maxBees = 5;
-                        const beeEmoji = '🐝';
-
-                        function createBee() {
-                            // Check if bee theme is active
-                            const isBeeTheme = document.documentElement.getAttribute('data-color-theme') === 'bee';
-                            if (!isBeeTheme || activeBees >= maxBees) {
-                                return;
-                            }
-
-                            activeBees++;
-                            const bee = document.createElement('div');
-                            bee.className = 'bee';
-                            bee.textContent = beeEmoji;
-
-                            // Random size (20px to 32px)
-                            const size = 20 + Math.random() * 12;
-                            bee.style.fontSize = size + 'px';
-
-                            // Random starting position (top third of screen)
-                            const startY = Math.random() * (window.innerHeight / 3);
-                            const startX = Math.random() < 0.5 ? -50 : window.innerWidth + 50;
-                            const endX = startX < 0 ? window.innerWidth + 50 : -50;
-
-                            // Determine direction: flip bee based on flight direction
-                            const flyingLeftToRight = startX < 0;
-                            if (flyingLeftToRight) {
-                                bee.style.transform = 'scaleX(-1)';
-                            }
-
-                            // Random end position (different height)
-                            const endY = startY + (Math.random() - 0.5) * 200;
-
-                            // Random duration (3-6 seconds)
-                            const duration = 3000 + Math.random() * 3000;
-
-                            bee.style.left = startX + 'px';
-                            bee.style.top = startY + 'px';
-
-                            beeContainer.appendChild(bee);
-
-                            // Animate bee
-                            let startTime = Date.now();
-
-                            function animateBee() {
-                                const elapsed = Date.now() - startTime;
-                                const progress = Math.min(elapsed / duration, 1);
-
-                                if (progress >= 1) {
-                                    bee.remove();
-                                    activeBees--;
-                                    return;
-                                }
-
-                                // Ease in-out progress
-                                const easeProgress = progress < 0.5
-                                    ? 2 * progress * progress
-                                    : 1 - Math.pow(-2 * progress + 2, 2) / 2;
-
-                                // Calculate position with sine wave for curved path
-                                const currentX = startX + (endX - startX) * easeProgress;
-                                const currentY = startY + (endY - startY) * easeProgress +
-                                                Math.sin(easeProgress * Math.PI * 2) * 30;
-
-                                // Fade in/out at edges
-                                let opacity = 1;
-                                if (progress < 0.1) {
-                                    opacity = progress / 0.1;
-                                } else if (progress > 0.9) {
-                                    opacity = (1 - progress) / 0.1;
-                                }
-
-                                bee.style.left = currentX + 'px';
-                                bee.style.top = currentY + 'px';
-                                bee.style.opacity = opacity;
-
-                                requestAnimationFrame(animateBee);
-                            }
-
-                            requestAnimationFrame(animateBee);
-                        }
-
-                        // Spawn bees at random intervals (3-6 seconds)
-                        function scheduleBee() {
-                            const delay = 3000 + Math.random() * 3000;
-                            setTimeout(() => {
-                                createBee();
-                                scheduleBee();
-                            }, delay);
-                        }
-
-                        // Start with a small delay
-                        setTimeout(() => {
-                            createBee();
-                            scheduleBee();
-                        }, 1000);
-                    });
-                '''
-                head.append(bee_flight_script)
-
-            # Inject side panel with user data
-            inject_side_panel(soup, service_name, token_data)
-
-            content = str(soup)
-
-        return Response(content, resp.status_code, response_headers)
+        if 'text/event-stream' in content_type:
+            # Small chunks so each event is forwarded as soon as it arrives
+            return Response(_stream_upstream(resp, chunk_size=1024), resp.status, response_headers)
 
-    except requests.exceptions.RequestException as e:
-        current_app.logger.error(f"Proxy error for {path}: {e}")
+        # Only HTML pages get injected into; JSON, downloads, images and HTML
+        # fetched by scripts (fragments, partials) stream through
+        if 'text/html' not in content_type or _is_script_request():
+            return Response(_stream_upstream(resp), resp.status, response_headers)
+
+        # Read the whole page for injection
+        try:
+            content = resp.read(decode_content=True)
+        finally:
+            resp.release_conn()
+
+        if page_key and _is_cacheable_page(resp, content):
+            _cache_page(page_key, fetched_at, resp.status, response_headers, content)
+
+        content = _decorate_page(content, service_name, token_data)
+        return Response(content, resp.status, response_headers)
+
+    except urllib3.exceptions.HTTPError as e:
+        if cached_page and time.time() - cached_page[0] < PAGE_CACHE_STALE_MAX:
+            current_app.logger.warning("Proxy error for %s: %s; serving cached page", path, e)
+            return _cached_page_response(cached_page, service_name, token_data, 'STALE')
+        current_app.logger.error("Proxy error for %s: %s", path, e)
         return "Service temporarily unavailable", 502
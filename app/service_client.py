@@ -10,40 +10,111 @@ Usage:
     response = call_service('codex', '/api/search', method='POST', json={'query': 'test'})
 """
 
-import requests
 from flask import current_app
+from app.http_client import core_session, service_session
+import base64
+import threading
 import time
-import jwt
+import orjson
+
+_JSON_HEADERS = {'Content-Type': 'application/json'}
 
 # Token cache: {target_service: {'token': str, 'expires_at': float}}
+# Shared by every request thread/greenlet in the worker, so guarded by a lock
 _token_cache = {}
+_token_cache_lock = threading.Lock()
+
+# Mints in progress: {target_service: Event set when the mint finishes}
+# Concurrent cache misses wait for the one mint instead of each asking Core
+_inflight = {}
+_inflight_lock = threading.Lock()
 
 def _get_cached_token(service_name):
     """Get cached token if valid, otherwise None."""
-    if service_name not in _token_cache:
+    with _token_cache_lock:
+        cache_entry = _token_cache.get(service_name)
+    if cache_entry is None:
         return None
 
-    cache_entry = _token_cache[service_name]
     # Check if token expires in next 60 seconds
     if cache_entry['expires_at'] - time.time() < 60:
         return None
 
     return cache_entry['token']
 
+def _token_exp(token):
+    """Read the exp claim of a JWT without verifying it (we trust Core, which minted it)."""
+    payload = token.split('.', 2)[1]
+    return orjson.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4))).get('exp')
+
 def _cache_token(service_name, token):
     """Cache token with expiration time."""
     try:
-        # Decode token to get expiration (without verification since we trust Core)
-        decoded = jwt.decode(token, options={"verify_signature": False})
-        expires_at = decoded.get('exp', time.time() + 300)  # Default 5 min if no exp
+        expires_at = _token_exp(token) or time.time() + 300  # Default 5 min if no exp
     except Exception:
         # If we can't decode, cache for 5 minutes
         expires_at = time.time() + 300
 
-    _token_cache[service_name] = {
-        'token': token,
-        'expires_at': expires_at
-    }
+    with _token_cache_lock:
+        _token_cache[service_name] = {
+            'token': token,
+            'expires_at': expires_at
+        }
+
+def _mint_service_token(service_name):
+    """Get a new service token from Core."""
+    core_url = current_app.config.get('CORE_SERVICE_URL')
+    calling_service = current_app.config.get('SERVICE_NAME', 'unknown')
+
+    token_response = core_session.post(
+        f"{core_url}/service-token",
+        data=orjson.dumps({
+            'calling_service': calling_service,
+            'target_service': service_name
+        }),
+        headers=_JSON_HEADERS,
+        timeout=5
+    )
+
+    if token_response.status_code != 200:
+        raise Exception(f"Failed to get service token from Core: {token_response.text}")
+
+    return orjson.loads(token_response.content)['token']
+
+def _get_service_token(service_name):
+    """
+    Return a valid token for service_name, minting and caching one if needed.
+
+    Only one mint per service runs at a time: other callers that miss the
+    cache meanwhile wait for it and reuse its token. If it fails, the next
+    waiter tries itself.
+    """
+    while True:
+        # Check for cached token first
+        token = _get_cached_token(service_name)
+        if token:
+            return token
+
+        with _inflight_lock:
+            done = _inflight.get(service_name)
+            if done is None:
+                done = _inflight[service_name] = threading.Event()
+                minting = True
+            else:
+                minting = False
+
+        if not minting:
+            done.wait(timeout=10)
+            continue
+
+        try:
+            token = _mint_service_token(service_name)
+            _cache_token(service_name, token)
+            return token
+        finally:
+            with _inflight_lock:
+                _inflight.pop(service_name, None)
+            done.set()
 
 def call_service(service_name, path, method='GET', **kwargs):
     """
@@ -54,7 +125,7 @@ def call_service(service_name, path, method='GET', **kwargs):
         service_name: The target service name (e.g., 'codex', 'template')
         path: The path to call (e.g., '/api/data')
         method: HTTP method (default: 'GET')
-        **kwargs: Additional arguments to pass to requests.request()
+        **kwargs: Additional arguments to pass to Session.request()
 
     Returns:
         requests.Response object
@@ -70,30 +141,7 @@ def call_service(service_name, path, method='GET', **kwargs):
 
     service_url = services[service_name]['url']
 
-    # Check for cached token first
-    token = _get_cached_token(service_name)
-
-    if not token:
-        # Get a new service token from Core
-        core_url = current_app.config.get('CORE_SERVICE_URL')
-        calling_service = current_app.config.get('SERVICE_NAME', 'unknown')
-
-        token_response = requests.post(
-            f"{core_url}/service-token",
-            json={
-                'calling_service': calling_service,
-                'target_service': service_name
-            },
-            timeout=5
-        )
-
-        if token_response.status_code != 200:
-            raise Exception(f"Failed to get service token from Core: {token_response.text}")
-
-        token = token_response.json()['token']
-
-        # Cache the token
-        _cache_token(service_name, token)
+    token = _get_service_token(service_name)
 
     # Make the request with auth header
     url = f"{service_url}{path}"
@@ -111,7 +159,7 @@ def call_service(service_name, path, method='GET', **kwargs):
     # Set default timeout if not specified (prevents hanging requests)
     kwargs.setdefault('timeout', 30)
 
-    response = requests.request(
+    response = service_session.request(
         method=method,
         url=url,
         headers=headers,
@@ -0,0 +1,81 @@
+// Matrix rain Easter egg animation (injected into every proxied page by Nexus)
+document.addEventListener('DOMContentLoaded', function() {
+    // Create canvas for Matrix rain
+    const canvas = document.createElement('canvas');
+    canvas.id = 'matrix-rain';
+    document.body.insertBefore(canvas, document.body.firstChild);
+
+    const ctx = canvas.getContext('2d');
+
+    // Matrix characters - Katakana + Latin + numbers
+    const chars = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789@#$%^&*()ｱｲｳｴｵｶｷｸｹｺｻｼｽｾｿﾀﾁﾂﾃﾄﾅﾆﾇﾈﾉﾊﾋﾌﾍﾎﾏﾐﾑﾒﾓﾔﾕﾖﾗﾘﾙﾚﾛﾜﾝ';
+    const fontSize = 14;
+    let columns = 0;
+    let drops = [];
+
+    // Set canvas size and recalculate columns/drops
+    function resizeCanvas() {
+        canvas.width = window.innerWidth;
+        canvas.height = window.innerHeight;
+
+        // Recalculate columns for new width
+        const newColumns = Math.floor(canvas.width / fontSize);
+
+        // Only reset drops if column count changed
+        if (newColumns !== columns) {
+            columns = newColumns;
+            drops = Array(columns).fill(1).map(() => Math.floor(Math.random() * canvas.height / fontSize));
+        }
+    }
+    resizeCanvas();
+    window.addEventListener('resize', resizeCanvas);
+
+    // Frame counter for slower animation
+    let frameCount = 0;
+    const frameSkip = 2; // Draw every 3rd frame (slower animation)
+
+    function drawMatrixRain() {
+        // Check if Matrix theme is active
+        const isMatrixTheme = document.documentElement.getAttribute('data-color-theme') === 'matrix';
+        if (!isMatrixTheme) {
+            ctx.clearRect(0, 0, canvas.width, canvas.height);
+            requestAnimationFrame(drawMatrixRain);
+            return;
+        }
+
+        // Only update every frameSkip frames for slower animation
+        frameCount++;
+        if (frameCount % (frameSkip + 1) !== 0) {
+            requestAnimationFrame(drawMatrixRain);
+            return;
+        }
+
+        // Semi-transparent black to create fade effect
+        ctx.fillStyle = 'rgba(0, 0, 0, 0.05)';
+        ctx.fillRect(0, 0, canvas.width, canvas.height);
+
+        // Matrix green text
+        ctx.fillStyle = '#00ff41';
+        ctx.font = fontSize + 'px monospace';
+
+        for (let i = 0; i < drops.length; i++) {
+            const char = chars[Math.floor(Math.random() * chars.length)];
+            const x = i * fontSize;
+            const y = drops[i] * fontSize;
+
+            ctx.fillText(char, x, y);
+
+            // Reset drop to top randomly after it falls off screen
+            if (y > canvas.height && Math.random() > 0.975) {
+                drops[i] = 0;
+            }
+
+            drops[i]++;
+        }
+
+        requestAnimationFrame(drawMatrixRain);
+    }
+
+    // Start animation
+    drawMatrixRain();
+});
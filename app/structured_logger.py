@@ -17,11 +17,16 @@ Usage in routes:
     })
 """
 
+import atexit
 import logging
-import json
-import uuid
-from datetime import datetime
-from flask import request, g, has_request_context
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from datetime import datetime, timezone
+
+import orjson
+from flask import request, g
 
 
 class JSONFormatter(logging.Formatter):
@@ -30,23 +35,34 @@ class JSONFormatter(logging.Formatter):
     """
 
     def format(self, record):
+        # getMessage() only needs to %-format when the call passed arguments
+        message = record.getMessage() if record.args else str(record.msg)
         log_data = {
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            # Serialized by orjson as ISO 8601 with a Z suffix
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc),
             'level': record.levelname,
             'logger': record.name,
-            'message': record.getMessage(),
+            'message': message,
             'module': record.module,
             'function': record.funcName,
             'line': record.lineno,
         }
 
-        # Add correlation ID if available
-        if has_request_context():
-            if hasattr(g, 'correlation_id'):
-                log_data['correlation_id'] = g.correlation_id
-            if hasattr(g, 'user') and g.user:
-                log_data['user_id'] = g.user.get('sub')
-                log_data['username'] = g.user.get('preferred_username')
+        # Add correlation ID if available. Only inside a request, which raises
+        # RuntimeError otherwise; g also exists in bare app contexts (CLI,
+        # startup, background threads) and must not be read there
+        try:
+            request.environ
+        except RuntimeError:
+            pass
+        else:
+            correlation_id = g.get('correlation_id')
+            user = g.get('user')
+            if correlation_id is not None:
+                log_data['correlation_id'] = correlation_id
+            if user:
+                log_data['user_id'] = user.get('sub')
+                log_data['username'] = user.get('preferred_username')
 
         # Add any extra fields from extra parameter
         if hasattr(record, 'extra_data'):
@@ -56,7 +72,33 @@ class JSONFormatter(logging.Formatter):
         if record.exc_info:
             log_data['exception'] = self.formatException(record.exc_info)
 
-        return json.dumps(log_data)
+        # default=str keeps a log line from failing on an unserializable extra field
+        return orjson.dumps(log_data, default=str, option=orjson.OPT_UTC_Z).decode()
+
+
+class _DrainFlushingStreamHandler(logging.StreamHandler):
+    """
+    StreamHandler for the queue listener that flushes once the queue is drained.
+
+    A burst of records is coalesced into a few large writes instead of one
+    write() syscall per line; a lone record is still written immediately.
+    """
+
+    def __init__(self, stream, log_queue):
+        super().__init__(stream)
+        self.log_queue = log_queue
+
+    def flush(self):
+        if self.log_queue.empty():
+            super().flush()
+
+
+def _block_buffered_stderr():
+    """stderr's fd reopened without line buffering (left open on close); sys.stderr if it has no fd."""
+    try:
+        return open(sys.stderr.fileno(), 'w', encoding='utf-8', errors='backslashreplace', closefd=False)
+    except (AttributeError, OSError, ValueError):
+        return sys.stderr
 
 
 class StructuredLoggerAdapter(logging.LoggerAdapter):
@@ -83,10 +125,14 @@ def setup_structured_logging(app, enable_json=True):
     1. Configures JSON log formatting
     2. Sets up correlation ID middleware
     3. Configures log level from environment
+
+    Records are formatted on the logging thread (correlation IDs need the
+    request context) and written to stderr by a QueueListener thread, so a
+    request never blocks on the log stream. Bursts are written in blocks.
     """
 
     # Configure log handler
-    handler = logging.StreamHandler()
+    handler = QueueHandler(queue.Queue())
 
     if enable_json:
         handler.setFormatter(JSONFormatter())
@@ -96,6 +142,12 @@ def setup_structured_logging(app, enable_json=True):
             '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
         ))
 
+    # The queued records are already formatted, so the stream writes them as-is
+    listener = QueueListener(handler.queue, _DrainFlushingStreamHandler(_block_buffered_stderr(), handler.queue))
+    listener.start()
+    # Drain the queue on shutdown; logging's own exit hook then flushes the stream
+    atexit.register(listener.stop)
+
     # Remove existing handlers and add ours
     app.logger.handlers.clear()
     app.logger.addHandler(handler)
@@ -104,13 +156,20 @@ def setup_structured_logging(app, enable_json=True):
     @app.before_request
     def set_correlation_id():
         """Generate or extract correlation ID for request tracing."""
-        # Check if correlation ID was passed from another service
-        g.correlation_id = request.headers.get('X-Correlation-ID', str(uuid.uuid4()))
+        # Check if correlation ID was passed from another service; only mint one
+        # (a plain random hex string, no UUID object) when the caller sent none
+        correlation_id = request.headers.get('X-Correlation-ID')
+        if correlation_id:
+            g.correlation_id = correlation_id
+        else:
+            g.correlation_id = os.urandom(16).hex()
+            g.correlation_id_generated = True
 
     @app.after_request
     def add_correlation_id_header(response):
-        """Add correlation ID to response headers for client tracking."""
-        if hasattr(g, 'correlation_id'):
+        """Add a generated correlation ID to response headers for client tracking."""
+        # A caller that sent its own X-Correlation-ID already knows it
+        if g.get('correlation_id_generated'):
             response.headers['X-Correlation-ID'] = g.correlation_id
         return response
 
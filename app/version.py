@@ -2,11 +2,13 @@
 Version utility for HiveMatrix Nexus.
 Reads git information to generate version string.
 Falls back to VERSION file if git is unavailable.
+
+The VERSION file also serves as a cache: when it was written for the commit
+.git/HEAD points at, it is used without running git at all.
 """
 
 import subprocess
 import os
-from datetime import datetime
 
 def get_version():
     """
@@ -19,6 +21,14 @@ def get_version():
     repo_dir = os.path.dirname(script_dir)  # Go up to repo root
     version_file = os.path.join(repo_dir, 'VERSION')
 
+    # VERSION file still matching HEAD: nothing changed, skip the git processes
+    cached_version = _read_version_file(version_file)
+    head_commit = _read_git_head(repo_dir)
+    if cached_version and head_commit:
+        cached_hash = cached_version.rsplit('-', 1)[-1]
+        if len(cached_hash) >= 7 and head_commit.startswith(cached_hash):
+            return cached_version
+
     # Try git first
     version = _get_version_from_git(repo_dir)
 
@@ -32,44 +42,59 @@ def get_version():
         return version
 
     # Fallback: read from VERSION file
-    if os.path.exists(version_file):
-        try:
-            with open(version_file, 'r') as f:
-                return f.read().strip()
-        except Exception:
-            pass
+    return cached_version or "unknown"
 
-    return "unknown"
+def _read_version_file(version_file):
+    """Contents of the VERSION file, or None if it is missing or unreadable."""
+    try:
+        with open(version_file, 'r') as f:
+            return f.read().strip() or None
+    except Exception:
+        return None
+
+def _read_git_head(repo_dir):
+    """Full commit hash HEAD points at, read from .git directly, or None."""
+    git_dir = os.path.join(repo_dir, '.git')
+    try:
+        with open(os.path.join(git_dir, 'HEAD'), 'r') as f:
+            head = f.read().strip()
+        if not head.startswith('ref: '):
+            return head or None  # Detached HEAD holds the hash itself
+
+        ref = head[len('ref: '):]
+        ref_path = os.path.join(git_dir, ref)
+        if os.path.exists(ref_path):
+            with open(ref_path, 'r') as f:
+                return f.read().strip() or None
+
+        # Ref not stored loose: look it up in packed-refs
+        with open(os.path.join(git_dir, 'packed-refs'), 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == ref:
+                    return parts[0]
+    except Exception:
+        pass  # No .git directory (e.g. a worktree or an exported tree)
+    return None
 
 def _get_version_from_git(repo_dir):
     """Try to get version from git."""
     try:
-        # Get short git commit hash
+        # Get short git commit hash and commit date in one git process
+        # GIT_OPTIONAL_LOCKS=0: a read-only query shouldn't take the index lock
         result = subprocess.run(
-            ['git', 'rev-parse', '--short', 'HEAD'],
+            ['git', 'log', '-1', '--format=%h|%ci', 'HEAD'],
             capture_output=True,
             text=True,
-            cwd=repo_dir
+            cwd=repo_dir,
+            env={**os.environ, 'GIT_OPTIONAL_LOCKS': '0'}
         )
         if result.returncode != 0:
             return None
-        commit_hash = result.stdout.strip()
-
-        # Get commit date
-        result = subprocess.run(
-            ['git', 'log', '-1', '--format=%ci'],
-            capture_output=True,
-            text=True,
-            cwd=repo_dir
-        )
+        commit_hash, _, commit_date = result.stdout.strip().partition('|')
 
-        if result.returncode == 0:
-            # Parse the date (format: 2024-11-19 14:30:00 -0500)
-            date_str = result.stdout.strip().split()[0]
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            date_formatted = date_obj.strftime('%Y.%m.%d')
-        else:
-            date_formatted = datetime.now().strftime('%Y.%m.%d')
+        # The date is fixed-width (format: 2024-11-19 14:30:00 -0500)
+        date_formatted = commit_date[:10].replace('-', '.')
 
         return f"{date_formatted}-{commit_hash}"
 
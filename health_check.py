@@ -19,24 +19,25 @@ Usage:
         return health_checker.get_health()
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from flask import jsonify
+from flask import current_app, jsonify
 import shutil
-import requests
 import time
 
-# Conditional imports - only import if needed
+# Optional dependencies (SQLAlchemy, requests) are imported by HealthChecker
+# only when the service configures the check that needs them; Redis checks
+# use the client the service passes in. orjson, when installed, encodes every
+# health response.
 try:
-    from sqlalchemy import text
-    HAS_SQLALCHEMY = True
+    import orjson
+    HAS_ORJSON = True
 except ImportError:
-    HAS_SQLALCHEMY = False
+    HAS_ORJSON = False
 
-try:
-    import redis
-    HAS_REDIS = True
-except ImportError:
-    HAS_REDIS = False
+# Disk and dependency results are reused for this many seconds by default, so
+# bursts of probes (several monitors, load balancers) cost one round of checks
+CHECK_CACHE_TTL = 3
 
 
 class HealthChecker:
@@ -51,7 +52,11 @@ class HealthChecker:
     - Memory usage (optional)
     """
 
-    def __init__(self, service_name, db=None, redis_client=None, dependencies=None, neo4j_driver=None):
+    # Checks whose 'unhealthy' status makes the whole service unhealthy
+    _CRITICAL_CHECKS = ('database', 'neo4j', 'disk')
+
+    def __init__(self, service_name, db=None, redis_client=None, dependencies=None, neo4j_driver=None,
+                 cache_ttl=CHECK_CACHE_TTL):
         """
         Initialize health checker.
 
@@ -61,6 +66,8 @@ class HealthChecker:
             redis_client (Redis): Redis client instance (optional)
             dependencies (list): List of (name, url) tuples for dependent services
             neo4j_driver (neo4j.Driver): Neo4j driver instance (optional)
+            cache_ttl (float): Seconds to reuse disk/dependency results; 0 disables
+                the reuse (e.g. when the service caches the whole response itself)
         """
         self.service_name = service_name
         self.db = db
@@ -68,6 +75,47 @@ class HealthChecker:
         self.dependencies = dependencies or []
         self.neo4j_driver = neo4j_driver
 
+        # The SELECT 1 clause, built once; None when there is no database to
+        # check or SQLAlchemy is not installed
+        self._select_1 = None
+        if db is not None:
+            try:
+                from sqlalchemy import text
+                self._select_1 = text('SELECT 1')
+            except ImportError:
+                pass
+
+        # One keep-alive session for the dependency probes; without it every
+        # /health poll opened a new connection to each dependency
+        self.http = None
+        if self.dependencies:
+            import requests
+            self.http = requests.Session()
+            self._timeout_error = requests.exceptions.Timeout
+            self._connection_error = requests.exceptions.ConnectionError
+        # Dependencies are probed in parallel, so a check takes as long as the
+        # slowest one rather than the sum of all of them
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, len(self.dependencies)), thread_name_prefix='health-check'
+        ) if self.dependencies else None
+        # {check name: (monotonic time, result)}
+        self.cache_ttl = cache_ttl
+        self._check_cache = {}
+        # (total_gb, degraded bytes, unhealthy bytes): the disk's size never
+        # changes, so these are worked out on the first disk check
+        self._disk_limits = None
+
+    def _cached_result(self, name):
+        """A check's result if it ran less than cache_ttl seconds ago, else None."""
+        entry = self._check_cache.get(name)
+        if entry and time.monotonic() - entry[0] < self.cache_ttl:
+            return entry[1]
+        return None
+
+    def _cache_result(self, name, result):
+        self._check_cache[name] = (time.monotonic(), result)
+        return result
+
     def check_database(self):
         """
         Check PostgreSQL database connectivity and performance.
@@ -75,14 +123,13 @@ class HealthChecker:
         Returns:
             dict: Status with latency measurement
         """
-        if not self.db or not HAS_SQLALCHEMY:
+        if self._select_1 is None:
             return None
 
         try:
-            from sqlalchemy import text
-            start_time = time.time()
-            self.db.session.execute(text('SELECT 1'))
-            latency_ms = int((time.time() - start_time) * 1000)
+            start_time = time.perf_counter_ns()
+            self.db.session.execute(self._select_1)
+            latency_ms = (time.perf_counter_ns() - start_time) // 1_000_000
 
             return {
                 'status': 'healthy',
@@ -107,18 +154,22 @@ class HealthChecker:
             return None
 
         try:
-            start_time = time.time()
+            start_time = time.perf_counter_ns()
             self.redis_client.ping()
-            latency_ms = int((time.time() - start_time) * 1000)
+            latency_ms = (time.perf_counter_ns() - start_time) // 1_000_000
 
-            # Get Redis info
-            info = self.redis_client.info()
+            # Get Redis info - only the two INFO sections reported below,
+            # fetched in one round trip instead of the full INFO dump
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.info('clients')
+            pipe.info('memory')
+            clients_info, memory_info = pipe.execute()
 
             return {
                 'status': 'healthy',
                 'latency_ms': latency_ms,
-                'connected_clients': info.get('connected_clients', 0),
-                'used_memory_mb': round(info.get('used_memory', 0) / (1024**2), 2)
+                'connected_clients': clients_info.get('connected_clients', 0),
+                'used_memory_mb': round(memory_info.get('used_memory', 0) / (1024**2), 2)
             }
         except Exception as e:
             return {
@@ -137,11 +188,11 @@ class HealthChecker:
             return None
 
         try:
-            start_time = time.time()
+            start_time = time.perf_counter_ns()
             with self.neo4j_driver.session() as session:
                 result = session.run("RETURN 1 as test")
                 result.single()
-            latency_ms = int((time.time() - start_time) * 1000)
+            latency_ms = (time.perf_counter_ns() - start_time) // 1_000_000
 
             return {
                 'status': 'healthy',
@@ -162,75 +213,96 @@ class HealthChecker:
         Returns:
             dict: Disk usage statistics
         """
+        cached = self._cached_result('disk')
+        if cached is not None:
+            return cached
+
         try:
             disk = shutil.disk_usage('/')
-            usage_percent = (disk.used / disk.total) * 100
-            free_gb = disk.free / (1024**3)
-
-            # Determine status based on usage
-            if usage_percent >= 95:
+            if self._disk_limits is None:
+                self._disk_limits = (
+                    round(disk.total / (1024**3), 2),
+                    int(disk.total * 0.85),
+                    int(disk.total * 0.95)
+                )
+            total_gb, degraded_bytes, unhealthy_bytes = self._disk_limits
+
+            # Determine status based on usage (85% degraded, 95% unhealthy)
+            if disk.used >= unhealthy_bytes:
                 status = 'unhealthy'
-            elif usage_percent >= 85:
+            elif disk.used >= degraded_bytes:
                 status = 'degraded'
             else:
                 status = 'healthy'
 
-            return {
+            return self._cache_result('disk', {
                 'status': status,
-                'usage_percent': round(usage_percent, 2),
-                'free_gb': round(free_gb, 2),
-                'total_gb': round(disk.total / (1024**3), 2)
-            }
+                'usage_percent': round(disk.used * 100 / disk.total, 2),
+                'free_gb': round(disk.free / (1024**3), 2),
+                'total_gb': total_gb
+            })
         except Exception as e:
             return {
                 'status': 'unknown',
                 'error': str(e)
             }
 
-    def check_dependencies(self):
+    def _check_dependency(self, dep_url):
+        """Probe one dependent service's /health endpoint."""
+        try:
+            start_time = time.perf_counter_ns()
+            response = self.http.get(f"{dep_url}/health", timeout=3)
+            latency_ms = (time.perf_counter_ns() - start_time) // 1_000_000
+
+            if response.status_code == 200:
+                return {
+                    'status': 'healthy',
+                    'response_time_ms': latency_ms
+                }
+            return {
+                'status': 'unhealthy',
+                'http_status': response.status_code
+            }
+        except self._timeout_error:
+            return {
+                'status': 'unhealthy',
+                'error': 'timeout'
+            }
+        except self._connection_error:
+            return {
+                'status': 'unhealthy',
+                'error': 'connection_refused'
+            }
+        except Exception as e:
+            return {
+                'status': 'unhealthy',
+                'error': str(e)
+            }
+
+    def _start_dependency_checks(self):
+        """Start probing every dependency in the background: [(name, future)]."""
+        return [(dep_name, self._executor.submit(self._check_dependency, dep_url))
+                for dep_name, dep_url in self.dependencies]
+
+    def check_dependencies(self, pending=None):
         """
         Check health of dependent services.
 
+        Args:
+            pending (list): Probes already started by _start_dependency_checks (optional)
+
         Returns:
             dict: Health status of each dependency
         """
         if not self.dependencies:
             return None
 
-        results = {}
-        for dep_name, dep_url in self.dependencies:
-            try:
-                start_time = time.time()
-                response = requests.get(f"{dep_url}/health", timeout=3)
-                latency_ms = int((time.time() - start_time) * 1000)
-
-                if response.status_code == 200:
-                    results[dep_name] = {
-                        'status': 'healthy',
-                        'response_time_ms': latency_ms
-                    }
-                else:
-                    results[dep_name] = {
-                        'status': 'unhealthy',
-                        'http_status': response.status_code
-                    }
-            except requests.exceptions.Timeout:
-                results[dep_name] = {
-                    'status': 'unhealthy',
-                    'error': 'timeout'
-                }
-            except requests.exceptions.ConnectionError:
-                results[dep_name] = {
-                    'status': 'unhealthy',
-                    'error': 'connection_refused'
-                }
-            except Exception as e:
-                results[dep_name] = {
-                    'status': 'unhealthy',
-                    'error': str(e)
-                }
-
-        return results
+        if pending is None:
+            cached = self._cached_result('dependencies')
+            if cached is not None:
+                return cached
+            pending = self._start_dependency_checks()
+        return self._cache_result('dependencies', {dep_name: future.result() for dep_name, future in pending})
 
     def get_overall_status(self, checks):
         """
@@ -248,34 +320,39 @@ class HealthChecker:
             str: 'healthy', 'degraded', or 'unhealthy'
         """
         # Critical components that cause unhealthy status
-        if 'database' in checks and checks['database']['status'] == 'unhealthy':
-            return 'unhealthy'
-
-        if 'neo4j' in checks and checks['neo4j']['status'] == 'unhealthy':
-            return 'unhealthy'
-
-        # Check disk space
-        if 'disk' in checks and checks['disk']['status'] == 'unhealthy':
-            return 'unhealthy'
+        for name in self._CRITICAL_CHECKS:
+            check = checks.get(name)
+            if check and check['status'] == 'unhealthy':
+                return 'unhealthy'
 
         # Check for degraded state
-        degraded_checks = []
+        redis_check = checks.get('redis')
+        if redis_check and redis_check['status'] != 'healthy':
+            return 'degraded'
 
-        if 'redis' in checks and checks['redis']['status'] != 'healthy':
-            degraded_checks.append('redis')
+        disk_check = checks.get('disk')
+        if disk_check and disk_check['status'] == 'degraded':
+            return 'degraded'
 
-        if 'disk' in checks and checks['disk']['status'] == 'degraded':
-            degraded_checks.append('disk')
+        for dep_status in checks.get('dependencies', {}).values():
+            if dep_status['status'] != 'healthy':
+                return 'degraded'
 
-        if 'dependencies' in checks:
-            for dep_name, dep_status in checks['dependencies'].items():
-                if dep_status['status'] != 'healthy':
-                    degraded_checks.append(f"dependency:{dep_name}")
+        return 'healthy'
 
-        if degraded_checks:
-            return 'degraded'
+    def _json_response(self, payload):
+        """
+        JSON response for a health payload, keys sorted like jsonify's.
 
-        return 'healthy'
+        orjson writes the timestamp datetime as ISO 8601 itself; without it
+        the timestamp is converted first (jsonify would make it an HTTP date).
+        """
+        if HAS_ORJSON:
+            return current_app.response_class(
+                orjson.dumps(payload, option=orjson.OPT_SORT_KEYS), mimetype='application/json'
+            )
+        payload['timestamp'] = payload['timestamp'].isoformat()
+        return jsonify(payload)
 
     def get_health(self):
         """
@@ -284,10 +361,16 @@ class HealthChecker:
         Returns:
             tuple: (dict, int) - Health status dictionary and HTTP status code
         """
+        # Dependency probes run while the local checks below do theirs
+        # (those stay on this thread: they may need the app context)
+        pending_dependencies = None
+        if self.dependencies and self._cached_result('dependencies') is None:
+            pending_dependencies = self._start_dependency_checks()
+
         health = {
             'service': self.service_name,
             'status': 'healthy',
-            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'timestamp': datetime.now(timezone.utc),
             'checks': {}
         }
 
@@ -310,7 +393,7 @@ class HealthChecker:
         health['checks']['disk'] = self.check_disk_space()
 
         # Dependency checks
-        dep_health = self.check_dependencies()
+        dep_health = self.check_dependencies(pending_dependencies)
         if dep_health:
             health['checks']['dependencies'] = dep_health
 
@@ -322,7 +405,7 @@ class HealthChecker:
         # 503 = unhealthy or degraded (service unavailable)
         status_code = 200 if health['status'] == 'healthy' else 503
 
-        return jsonify(health), status_code
+        return self._json_response(health), status_code
 
     def get_simple_health(self):
         """
@@ -332,8 +415,8 @@ class HealthChecker:
         Returns:
             tuple: (dict, int) - Simple status and HTTP 200
         """
-        return jsonify({
+        return self._json_response({
             'service': self.service_name,
             'status': 'alive',
-            'timestamp': datetime.now(timezone.utc).isoformat()
+            'timestamp': datetime.now(timezone.utc)
         }), 200
@@ -91,6 +91,13 @@ KEYCLOAK_CLIENT_ID=core-client
 # Session
 SECRET_KEY=$(openssl rand -base64 32 | tr -d "=+/" | cut -c1-32)
 
+# Redis (optional - shares rate-limit counters across gunicorn workers)
+# REDIS_URI=redis://localhost:6379/0
+# SESSION_STORE=redis
+
+# API docs at /docs (development only)
+# ENABLE_SWAGGER=true
+
 # SSL Configuration (disable for self-signed certs)
 VERIFY_SSL=False
 EOF
@@ -5,7 +5,30 @@ import sys
 from dotenv import load_dotenv
 load_dotenv('.flaskenv')
 
-from app import app
+
+def serve_with_gunicorn(options):
+    """Run the gunicorn arbiter in this process with the given settings."""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print(" * ERROR: gunicorn is not installed")
+        print(" * Install with: pip install gunicorn")
+        sys.exit(1)
+
+    class NexusApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            # Imported by each worker after gevent has patched it, never by
+            # the arbiter: the app starts background threads (log listener,
+            # Helm sender, JWKS refresh) that would not survive the fork
+            from app import app
+            return app
+
+    NexusApplication().run()
+
 
 if __name__ == "__main__":
     # Nexus is the main entry point
@@ -23,45 +46,35 @@ if __name__ == "__main__":
         cert_file = os.path.join(cert_dir, 'nexus.crt')
         key_file = os.path.join(cert_dir, 'nexus.key')
 
-        # Find gunicorn in venv
-        venv_bin = os.path.join(os.path.dirname(__file__), 'pyenv', 'bin')
-        gunicorn_path = os.path.join(venv_bin, 'gunicorn')
-
-        if not os.path.exists(gunicorn_path):
-            print(f" * ERROR: gunicorn not found at {gunicorn_path}")
-            print(f" * Install with: pip install gunicorn")
-            sys.exit(1)
-
-        # Build gunicorn command
-        # Important: Run Python directly with gunicorn module to preserve capabilities
-        # Using the gunicorn wrapper script breaks capability inheritance
-        python_path = sys.executable
-        cmd = [
-            python_path,
-            '-m', 'gunicorn',
-            '--bind', f'{host}:{port}',
-            '--workers', '4',
-            '--worker-class', 'gevent',  # Use gevent for SSE streaming support
-            '--timeout', '300',  # Longer timeout for SSE connections
-            '--access-logfile', '-',
-            '--error-logfile', '-',
-        ]
+        # gevent workers run each request on a greenlet, so a worker waiting on
+        # backends keeps serving others; GUNICORN_WORKER_CONNECTIONS caps how
+        # many requests (including open SSE streams) one worker holds at once
+        options = {
+            'bind': f'{host}:{port}',
+            'workers': int(os.environ.get('GUNICORN_WORKERS', '4')),
+            'worker_class': 'gevent',  # Use gevent for SSE streaming support
+            'worker_connections': int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', '1000')),
+            'timeout': 300,  # Longer timeout for SSE connections
+            'accesslog': '-',
+            'errorlog': '-',
+        }
 
         # Add SSL if certs exist and running on 443
         if port == 443 and os.path.exists(cert_file) and os.path.exists(key_file):
-            cmd.extend(['--certfile', cert_file])
-            cmd.extend(['--keyfile', key_file])
+            options['certfile'] = cert_file
+            options['keyfile'] = key_file
             print(f" * Nexus starting with HTTPS on {host}:{port}", flush=True)
         else:
             print(f" * Nexus starting on http://{host}:{port}", flush=True)
 
-        cmd.append('app:app')
         print(f" * Using Gunicorn WSGI server (production mode)", flush=True)
-        print(f" * Command: {' '.join(cmd)}", flush=True)
 
-        # Execute gunicorn via Python to preserve capabilities
-        os.execvp(python_path, cmd)
+        # Gunicorn runs in this process, so there is no second interpreter start
+        # and the process keeps its capabilities (e.g. binding port 443)
+        serve_with_gunicorn(options)
     else:
+        from app import app
+
         # Development mode with Flask's built-in server
         # Live reloading enabled for CSS/HTML/Python changes
         if port == 443:
@@ -79,3 +92,6 @@ if __name__ == "__main__":
             print(f" * Nexus starting on http://{host}:{port}")
             print(f" * Using Flask development server (live reloading enabled)")
             app.run(host=host, port=port, debug=True)
+else:
+    # Imported as a module (flask run with FLASK_APP=run.py)
+    from app import app
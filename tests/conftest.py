@@ -0,0 +1,14 @@
+"""
+Shared pytest setup.
+
+The app package reads its configuration from the environment at import, so
+the minimum it needs is set here before any test module imports it.
+"""
+import os
+
+os.environ.setdefault('SECRET_KEY', 'test-secret-key')
+os.environ.setdefault('ENABLE_JSON_LOGGING', 'false')
+os.environ.setdefault('LOG_STARTUP', 'false')
+# Nothing listens here, so Core/Helm calls made at import fail fast
+os.environ.setdefault('CORE_SERVICE_URL', 'http://127.0.0.1:9')
+os.environ.setdefault('HELM_SERVICE_URL', 'http://127.0.0.1:9')
@@ -0,0 +1,135 @@
+"""Tests for the Core session's circuit breaker."""
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+from app import http_client
+from app.http_client import CircuitBreakerAdapter
+
+
+class Clock:
+    """Stand-in for the time module with a settable monotonic()."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(http_client, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Make HTTPAdapter.send run upstream.behaviour(adapter, request) and count the calls."""
+    class Upstream:
+        calls = 0
+
+        @staticmethod
+        def behaviour(adapter, request):
+            return 'response'
+
+    def send(adapter, request, **kwargs):
+        Upstream.calls += 1
+        return Upstream.behaviour(adapter, request)
+
+    monkeypatch.setattr(HTTPAdapter, 'send', send)
+    return Upstream
+
+
+def _request():
+    return requests.Request('GET', 'http://core.test/api').prepare()
+
+
+def _refused(adapter, request):
+    raise requests.exceptions.ConnectionError('refused')
+
+
+def test_opens_after_fail_max_connection_errors(clock, upstream):
+    adapter = CircuitBreakerAdapter(fail_max=3, reset_timeout=30)
+    upstream.behaviour = _refused
+
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.ConnectionError, match='refused'):
+            adapter.send(_request())
+
+    # Open: fails fast without calling the upstream
+    with pytest.raises(requests.exceptions.ConnectionError, match='Circuit open'):
+        adapter.send(_request())
+    assert upstream.calls == 3
+
+
+def test_half_open_admits_a_single_probe_then_closes(clock, upstream):
+    adapter = CircuitBreakerAdapter(fail_max=2, reset_timeout=30)
+    upstream.behaviour = _refused
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            adapter.send(_request())
+
+    clock.now += 31
+
+    concurrent = []
+
+    def probe(adapter, request):
+        # A request arriving while the probe is in flight still fails fast
+        with pytest.raises(requests.exceptions.ConnectionError, match='Circuit open'):
+            adapter.send(_request())
+        concurrent.append(True)
+        return 'response'
+
+    upstream.behaviour = probe
+    assert adapter.send(_request()) == 'response'
+    assert concurrent == [True]
+
+    # Closed again: requests go straight through
+    upstream.behaviour = lambda adapter, request: 'response'
+    assert adapter.send(_request()) == 'response'
+    assert upstream.calls == 4
+
+
+def test_failed_probe_reopens(clock, upstream):
+    adapter = CircuitBreakerAdapter(fail_max=2, reset_timeout=30)
+    upstream.behaviour = _refused
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            adapter.send(_request())
+
+    clock.now += 31
+    with pytest.raises(requests.exceptions.ConnectionError, match='refused'):
+        adapter.send(_request())
+
+    with pytest.raises(requests.exceptions.ConnectionError, match='Circuit open'):
+        adapter.send(_request())
+    assert upstream.calls == 3
+
+
+def test_read_timeouts_do_not_open(clock, upstream):
+    adapter = CircuitBreakerAdapter(fail_max=2, reset_timeout=30)
+
+    def slow(adapter, request):
+        raise requests.exceptions.ReadTimeout('slow')
+
+    upstream.behaviour = slow
+    for _ in range(5):
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            adapter.send(_request())
+    assert upstream.calls == 5
+
+
+def test_connect_timeouts_count_as_failures(clock, upstream):
+    adapter = CircuitBreakerAdapter(fail_max=2, reset_timeout=30)
+
+    def unreachable(adapter, request):
+        raise requests.exceptions.ConnectTimeout('connect timeout')
+
+    upstream.behaviour = unreachable
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.ConnectTimeout):
+            adapter.send(_request())
+    with pytest.raises(requests.exceptions.ConnectionError, match='Circuit open'):
+        adapter.send(_request())
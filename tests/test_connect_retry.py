@@ -0,0 +1,66 @@
+"""Tests that CONNECT_RETRY never sends a request twice."""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.http_client import CONNECT_RETRY, keycloak_session, service_pool
+
+
+@pytest.fixture
+def backend():
+    """Local server answering every request with backend.status and headers; counts hits."""
+    class Handler(BaseHTTPRequestHandler):
+        hits = 0
+        status = 503
+        headers_out = {'Retry-After': '2'}
+
+        def log_message(self, *args):
+            pass
+
+        def _respond(self):
+            type(self).hits += 1
+            self.send_response(self.status)
+            for name, value in self.headers_out.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        do_GET = do_PUT = _respond
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    Handler.url = f'http://127.0.0.1:{server.server_port}/resource'
+    yield Handler
+    server.shutdown()
+    server.server_close()
+
+
+def test_retry_after_is_not_honoured_by_service_pool(backend):
+    start = time.monotonic()
+    response = service_pool.request('PUT', backend.url, body=b'x', retries=CONNECT_RETRY, redirect=False)
+
+    assert response.status == 503
+    assert backend.hits == 1
+    assert time.monotonic() - start < 1
+
+
+def test_retry_after_is_not_honoured_by_sessions(backend):
+    start = time.monotonic()
+    response = keycloak_session.get(backend.url, timeout=5)
+
+    assert response.status_code == 503
+    assert backend.hits == 1
+    assert time.monotonic() - start < 1
+
+
+def test_redirects_are_returned_not_followed(backend):
+    backend.status = 302
+    backend.headers_out = {'Location': '/elsewhere'}
+
+    response = service_pool.request('GET', backend.url, retries=CONNECT_RETRY, redirect=False)
+
+    assert response.status == 302
+    assert backend.hits == 1
@@ -0,0 +1,56 @@
+"""Tests for the orjson JSON provider."""
+from datetime import datetime, timezone
+
+import orjson
+import pytest
+from flask import jsonify
+
+from app import app
+from app import json_provider
+
+
+@pytest.fixture
+def orjson_calls(monkeypatch):
+    """Record every orjson.dumps call the provider makes."""
+    calls = []
+    real_dumps = orjson.dumps
+
+    def spy(*args, **kwargs):
+        calls.append(args[0])
+        return real_dumps(*args, **kwargs)
+
+    monkeypatch.setattr(json_provider.orjson, 'dumps', spy)
+    return calls
+
+
+def test_jsonify_encodes_with_orjson(orjson_calls):
+    with app.test_request_context():
+        response = jsonify({'b': 1, 'a': [1, 2]})
+
+    assert orjson_calls[-1] == {'b': 1, 'a': [1, 2]}
+    assert response.mimetype == 'application/json'
+    assert response.get_data() == b'{"a":[1,2],"b":1}\n'
+
+
+def test_jsonify_pretty_prints_when_not_compact(orjson_calls, monkeypatch):
+    monkeypatch.setattr(app.json, 'compact', False)
+    with app.test_request_context():
+        response = jsonify(a=1)
+
+    assert orjson_calls[-1] == {'a': 1}
+    assert response.get_data() == b'{\n  "a": 1\n}\n'
+
+
+def test_compact_dumps_uses_orjson(orjson_calls):
+    with app.app_context():
+        assert app.json.dumps({'b': 1, 'a': 2}, separators=(',', ':')) == '{"a":2,"b":1}'
+        assert app.json.dumps({'a': 1}, indent=2) == '{\n  "a": 1\n}'
+
+    assert orjson_calls == [{'b': 1, 'a': 2}]
+
+
+def test_datetimes_stay_http_dates():
+    with app.test_request_context():
+        response = jsonify(when=datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc))
+
+    assert response.get_json() == {'when': 'Tue, 02 Jan 2024 03:04:05 GMT'}
@@ -0,0 +1,164 @@
+"""Tests for the opt-in per-user page cache in main_gateway."""
+import io
+
+import pytest
+import urllib3
+
+from app import app
+from app import routes
+
+PAGE = b'<html><body><p>page</p></body></html>'
+USER = {'sub': 'user-1', 'permission_level': 'admin', 'email': 'u@example.com'}
+
+
+class FakeRedis:
+    """The get/set subset of a Redis client, backed by a dict."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = str(value).encode()
+
+
+class Backend:
+    """Stand-in for service_pool.request: answers with .status/.headers/.body, or raises .error."""
+
+    def __init__(self):
+        self.calls = []
+        self.status = 200
+        self.headers = {'Content-Type': 'text/html; charset=utf-8'}
+        self.body = PAGE
+        self.error = None
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url))
+        if self.error:
+            raise self.error
+        return urllib3.HTTPResponse(body=io.BytesIO(self.body), headers=self.headers,
+                                    status=self.status, preload_content=False)
+
+    @property
+    def gets(self):
+        return sum(1 for method, _ in self.calls if method == 'GET')
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = Backend()
+    monkeypatch.setattr(routes, 'service_pool', backend)
+    monkeypatch.setattr(routes, 'validate_token', lambda token: USER)
+    # Theme/side panel decoration is covered elsewhere; keep bodies as sent
+    monkeypatch.setattr(routes, '_decorate_page', lambda html, service_name, token_data: html)
+    monkeypatch.setitem(routes.SERVICES, 'wiki', {'url': 'http://wiki.test', 'cache_ttl': 60})
+    monkeypatch.setattr(routes, 'get_redis', lambda: None)
+    routes._page_cache.clear()
+    yield backend
+    routes._page_cache.clear()
+
+
+@pytest.fixture
+def client():
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['token'] = 'jwt'
+    return client
+
+
+def test_second_get_is_a_hit(backend, client):
+    first = client.get('/wiki/page')
+    second = client.get('/wiki/page')
+
+    assert 'X-Cache' not in first.headers
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.data == PAGE
+    assert backend.gets == 1
+
+
+def test_write_drops_the_users_pages(backend, client):
+    client.get('/wiki/page')
+    client.post('/wiki/page', data={'title': 'new'})
+    response = client.get('/wiki/page')
+
+    assert 'X-Cache' not in response.headers
+    assert backend.gets == 2
+
+
+def test_write_in_another_worker_drops_the_users_pages(backend, client, monkeypatch):
+    redis_client = FakeRedis()
+    monkeypatch.setattr(routes, 'get_redis', lambda: redis_client)
+    client.get('/wiki/page')
+    assert client.get('/wiki/page').headers['X-Cache'] == 'HIT'
+
+    # Another worker proxied a write: only Redis knows about it
+    fetched_at = routes._page_cache[('user-1', 'wiki', '/wiki/page?')][0]
+    redis_client.set(f"{routes.PAGE_CACHE_WRITE_PREFIX}user-1:wiki", fetched_at + 1)
+    response = client.get('/wiki/page')
+
+    assert 'X-Cache' not in response.headers
+    assert backend.gets == 2
+
+
+def test_write_records_its_time_in_redis(backend, client, monkeypatch):
+    redis_client = FakeRedis()
+    monkeypatch.setattr(routes, 'get_redis', lambda: redis_client)
+    client.post('/wiki/page', data={'title': 'new'})
+
+    assert f"{routes.PAGE_CACHE_WRITE_PREFIX}user-1:wiki" in redis_client.data
+
+
+def test_unreachable_backend_serves_stale_page(backend, client, monkeypatch):
+    client.get('/wiki/page')
+    fetched_at, *rest = routes._page_cache[('user-1', 'wiki', '/wiki/page?')]
+    routes._page_cache[('user-1', 'wiki', '/wiki/page?')] = (fetched_at - 120, *rest)
+    backend.error = urllib3.exceptions.NewConnectionError(None, 'refused')
+
+    response = client.get('/wiki/page')
+
+    assert response.status_code == 200
+    assert response.headers['X-Cache'] == 'STALE'
+    assert response.data == PAGE
+
+
+def test_unreachable_backend_without_cached_page_is_502(backend, client):
+    backend.error = urllib3.exceptions.NewConnectionError(None, 'refused')
+
+    assert client.get('/wiki/page').status_code == 502
+
+
+def test_stale_page_is_not_served_after_a_write(backend, client):
+    client.get('/wiki/page')
+    backend.error = urllib3.exceptions.NewConnectionError(None, 'refused')
+    client.post('/wiki/page', data={'title': 'new'})
+
+    assert client.get('/wiki/page').status_code == 502
+
+
+@pytest.mark.parametrize('status, headers, body', [
+    (404, {}, PAGE),
+    (200, {'Set-Cookie': 'sid=1'}, PAGE),
+    (200, {'Cache-Control': 'private, no-store'}, PAGE),
+    (200, {}, b'x' * (routes.PAGE_CACHE_MAX_BYTES + 1)),
+])
+def test_uncacheable_pages_are_not_stored(backend, client, status, headers, body):
+    backend.status = status
+    backend.headers = {'Content-Type': 'text/html', **headers}
+    backend.body = body
+
+    client.get('/wiki/page')
+    response = client.get('/wiki/page')
+
+    assert 'X-Cache' not in response.headers
+    assert backend.gets == 2
+
+
+def test_services_without_cache_ttl_are_not_cached(backend, client, monkeypatch):
+    monkeypatch.setitem(routes.SERVICES, 'wiki', {'url': 'http://wiki.test'})
+
+    client.get('/wiki/page')
+    client.get('/wiki/page')
+
+    assert backend.gets == 2
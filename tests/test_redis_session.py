@@ -0,0 +1,61 @@
+"""Tests for the Redis server-side session store."""
+import pytest
+
+from app import app
+from app import redis_session
+from app.redis_session import RedisSessionInterface
+
+
+class FakeRedis:
+    """The get/setex/delete subset of a Redis client, backed by a dict."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(redis_session, 'get_redis', lambda: fake)
+    return fake
+
+
+def _open(interface, sid=None):
+    cookie = f"{app.config['SESSION_COOKIE_NAME']}={sid}" if sid else None
+    with app.test_request_context(headers={'Cookie': cookie} if cookie else {}) as ctx:
+        return interface.open_session(app, ctx.request)
+
+
+def test_regenerate_moves_session_to_a_new_id(store):
+    interface = RedisSessionInterface()
+
+    # A pre-login session, as /login leaves it
+    pre_login = _open(interface)
+    pre_login['oauth_state'] = 'state'
+    interface.save_session(app, pre_login, app.response_class())
+    planted_sid = pre_login.sid
+
+    # The callback reopens it from the (possibly planted) cookie and logs in
+    session = _open(interface, planted_sid)
+    assert session['oauth_state'] == 'state'
+    session.regenerate()
+    session['token'] = 'jwt'
+    response = app.response_class()
+    interface.save_session(app, session, response)
+
+    assert session.sid != planted_sid
+    assert 'session:' + planted_sid not in store.data
+    assert 'session:' + session.sid in store.data
+    assert f"={session.sid};" in response.headers['Set-Cookie']
+
+    # The planted id no longer opens the logged-in session
+    assert 'token' not in _open(interface, planted_sid)